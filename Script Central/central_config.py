@@ -7,12 +7,9 @@ Les identifiants (username/password) sont chargés depuis le fichier auth.env pr
 """
 
 from typing import Dict, List
-import os
 from pathlib import Path
 
-from dotenv import dotenv_values
-
-from clients_config import CLIENTS
+from clients_config import CLIENTS, charger_env_client, charger_fichier_env
 
 
 # Chemin vers le fichier auth.env principal contenant les identifiants
@@ -35,14 +32,13 @@ def charger_identifiants_principaux() -> Dict[str, str]:
     ValueError
         Si les variables CENTRAL_USERNAME ou CENTRAL_PASSWORD sont manquantes.
     """
-    if not ENV_PRINCIPAL.exists():
+    valeurs_env = charger_fichier_env(ENV_PRINCIPAL)
+    if valeurs_env is None:
         raise FileNotFoundError(
             f"Le fichier auth.env principal est introuvable : {ENV_PRINCIPAL}\n"
             f"Créez ce fichier avec CENTRAL_USERNAME et CENTRAL_PASSWORD."
         )
 
-    valeurs_env = dotenv_values(ENV_PRINCIPAL)
-
     champs_attendus = {
         "CENTRAL_USERNAME",
         "CENTRAL_PASSWORD",
@@ -88,8 +84,10 @@ def charger_central_info(nom_client: str) -> Dict[str, str]:
     if nom_client not in CLIENTS:
         raise ValueError(f"Client inconnu : {nom_client}. Vérifiez clients_config.py.")
 
+    # Charger les paramètres depuis le fichier .env du client (mis en cache)
     chemin_env = CLIENTS[nom_client]
-    if not os.path.exists(chemin_env):
+    valeurs_env = charger_env_client(nom_client)
+    if valeurs_env is None:
         raise FileNotFoundError(
             f"Le fichier .env pour le client '{nom_client}' est introuvable : {chemin_env}"
         )
@@ -97,9 +95,6 @@ def charger_central_info(nom_client: str) -> Dict[str, str]:
     # Charger les identifiants depuis le fichier .env principal
     identifiants = charger_identifiants_principaux()
 
-    # Charger les autres paramètres depuis le fichier .env du client
-    valeurs_env = dotenv_values(chemin_env)
-
     champs_attendus = {
         "CLIENT_ID",
         "CLIENT_SECRET",
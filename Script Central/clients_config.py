@@ -10,35 +10,78 @@ le fichier auth.env à la racine de Script Central/.
 Le nom du client affiché dans le script correspond au nom du fichier sans l'extension `.env`.
 """
 
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Mapping, Optional, Union
+
+from dotenv import dotenv_values
 
 
 ENV_DIR = Path(__file__).resolve().parent / ".env"
 
 
-def charger_clients_depuis_dossier(env_dir: Path = ENV_DIR) -> Dict[str, str]:
+def charger_clients_depuis_dossier(env_dir: Path = ENV_DIR) -> Dict[str, Path]:
     """
     Scanne le dossier `.env` et retourne un dictionnaire {nom_client: chemin_fichier}.
+
+    Le dossier est lu en une seule passe (iterdir) et filtré sur l'extension `.env`.
     """
     if not env_dir.exists():
         raise RuntimeError(
             f"Le dossier {env_dir} n'existe pas. Créez-le et ajoutez des fichiers .env."
         )
 
-    fichiers_env = sorted(env_dir.glob("*.env"))
+    fichiers_env = sorted(
+        (fichier for fichier in env_dir.iterdir() if fichier.suffix == ".env"),
+        key=lambda fichier: fichier.stem,
+    )
     if not fichiers_env:
         raise RuntimeError(
             f"Aucun fichier .env trouvé dans {env_dir}. Ajoutez au moins un fichier client."
         )
 
-    return {fichier.stem: str(fichier) for fichier in fichiers_env}
+    return {fichier.stem: fichier for fichier in fichiers_env}
+
+
+@lru_cache(maxsize=None)
+def _charger_env_cache(chemin_env: str, mtime: float) -> Mapping[str, Optional[str]]:
+    """Parse un fichier .env ; la date de modification fait partie de la clé de cache."""
+    return dict(dotenv_values(chemin_env))
+
+
+def charger_fichier_env(chemin_env: Union[str, Path]) -> Optional[Mapping[str, Optional[str]]]:
+    """
+    Retourne les variables d'un fichier .env sans le relire tant qu'il n'a pas été modifié,
+    ou None si le fichier n'existe pas.
+
+    Un seul appel système (stat) suffit à vérifier l'existence du fichier et à valider le cache.
+    Le dictionnaire retourné est partagé entre les appels et ne doit pas être modifié.
+    """
+    chemin_env = Path(chemin_env)
+    try:
+        mtime = chemin_env.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    return _charger_env_cache(str(chemin_env), mtime)
 
 
 # Dictionnaire chargé dynamiquement à l'import du module
 CLIENTS = charger_clients_depuis_dossier()
 
 
+def charger_env_client(nom_client: str) -> Optional[Mapping[str, Optional[str]]]:
+    """
+    Retourne les variables du fichier .env d'un client (mises en cache),
+    ou None si son fichier n'existe plus.
+
+    Raises
+    ------
+    KeyError
+        Si le client n'est pas défini dans CLIENTS.
+    """
+    return charger_fichier_env(CLIENTS[nom_client])
+
+
 def verifier_configuration() -> None:
     """
     Fonction utilitaire (optionnelle) pour vérifier qu'au moins un client est disponible.
@@ -7,21 +7,33 @@ préparer les jeux de données utilisés dans le rapport Excel.
 
 from __future__ import annotations
 
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 from pycentral.base import ArubaCentralBase
 
 from script_inventaire import recuperer_inventaire
 from script_firmware_switch import get_firmware_switch
 from script_firmware_swarms import get_firmware_swarms
-from script_firmware_versions import get_firmware_versions, max_version_same_branch, max_version_same_branch_gateway
+from script_firmware_versions import (
+    build_branch_index,
+    build_gateway_branch_index,
+    get_firmware_versions,
+    max_version_from_gateway_index,
+    max_version_from_index,
+)
 from script_list_switches import lister_switches_stack
 from script_list_gateways import lister_gateways, enrichir_gateways_recommended
 
 
 DataFramesMap = Dict[str, pd.DataFrame]
 
+# Nombre d'appels API lancés simultanément lors de la collecte
+MAX_WORKERS_COLLECTE = 8
+
 CONSOLIDE_COLONNES = [
     "serial",
     "mac_address",
@@ -32,162 +44,196 @@ CONSOLIDE_COLONNES = [
     "firmware_max",
 ]
 
+# Renommage des colonnes des gateways vers la vue consolidée (firmware_max est repris tel quel)
+GATEWAYS_VERS_CONSOLIDE = {"mac_address": "macaddr", "hostname": "name"}
+
+# Ordre des premières colonnes de l'onglet Firmware Swarms
+SWARMS_COLONNES_ORDRE = [
+    "type_entree",
+    "serial",
+    "mac_address",
+    "hostname",
+    "model",
+    "site",
+    "vc_name",
+    "ip_address",
+    "vc_id",
+]
+
 
-def _concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
-    """Concatène une liste de DataFrame non vides."""
-    frames_valides = [df for df in frames if df is not None and not df.empty]
+def _concat_frames(*frames: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """Concatène les DataFrame fournis en ignorant ceux qui sont absents ou vides."""
+    frames_valides = [df for df in frames if df is not None and len(df)]
     if not frames_valides:
         return pd.DataFrame()
     return pd.concat(frames_valides, ignore_index=True)
 
 
+@lru_cache(maxsize=8)
+def _cached_firmware_versions(device_type: str, base_url: str) -> Tuple[str, ...]:
+    """Versions disponibles pour un type d'équipement, mémorisées pour le processus."""
+    return tuple(get_firmware_versions(device_type=device_type, base_url=base_url))
+
+
+def _recuperer_versions(device_type: str, libelle: str, base_url: str) -> Optional[Sequence[str]]:
+    """Récupère les versions disponibles ou None (avec un avertissement) en cas d'échec."""
+    try:
+        return _cached_firmware_versions(device_type, base_url)
+    except Exception as err:  # pragma: no cover - log utilisateur
+        print(f"⚠️ Impossible de récupérer les versions {libelle} :", err)
+        return None
+
+
+def _avec_colonnes_firmware(
+    df: pd.DataFrame,
+    firmware_max: Optional[pd.Series] = None,
+) -> pd.DataFrame:
+    """
+    Retourne `df` avec ses colonnes firmware_version (créée vide si absente) et
+    firmware_max (vide par défaut), ajoutées en un seul assign.
+    """
+    colonnes = {}
+    if "firmware_version" not in df.columns:
+        colonnes["firmware_version"] = pd.Series(None, index=df.index, dtype=object)
+    if firmware_max is None:
+        firmware_max = pd.Series(None, index=df.index, dtype=object)
+    colonnes["firmware_max"] = firmware_max
+    return df.assign(**colonnes)
+
+
 def _calculer_firmware_max_switches(
     df_switches: pd.DataFrame,
-    base_url: str,
+    versions_hp: Optional[Sequence[str]],
+    versions_cx: Optional[Sequence[str]],
 ) -> pd.DataFrame:
     """
     Calcule la meilleure version de firmware disponible pour chaque switch en
     se basant sur la même branche et selon le modèle (2930F / 6300).
     """
     if df_switches.empty:
-        df_switches["firmware_max"] = None
-        return df_switches
-
-    modele_series = df_switches["model"].fillna("").str.upper()
-
-    versions_hp: Optional[List[str]] = None
-    versions_cx: Optional[List[str]] = None
-
-    if (modele_series.str.contains("2930F")).any():
-        try:
-            versions_hp = get_firmware_versions(device_type="HP", base_url=base_url)
-        except Exception as err:  # pragma: no cover - log utilisateur
-            print("⚠️ Impossible de récupérer les versions HP :", err)
-
-    if (modele_series.str.contains("6300")).any():
-        try:
-            versions_cx = get_firmware_versions(device_type="CX", base_url=base_url)
-        except Exception as err:  # pragma: no cover - log utilisateur
-            print("⚠️ Impossible de récupérer les versions CX :", err)
-
-    def determiner_version_max(modele: str, version_actuelle: Optional[str]) -> Optional[str]:
-        if not version_actuelle:
-            return None
-
-        modele_upper = (modele or "").upper()
-        base_versions: Optional[List[str]] = None
-
-        if versions_hp and "2930F" in modele_upper:
-            base_versions = versions_hp
-        elif versions_cx and ("6300" in modele_upper or "CX" in modele_upper):
-            base_versions = versions_cx
-
-        if not base_versions:
-            return None
-
-        return max_version_same_branch(version_actuelle, base_versions)
-
-    df_switches["firmware_max"] = df_switches.apply(
-        lambda row: determiner_version_max(row.get("model"), row.get("firmware_version")),
-        axis=1,
+        return _avec_colonnes_firmware(df_switches)
+
+    # Une seule passe de mise en majuscules, puis des recherches de sous-chaînes en C
+    modeles = df_switches["model"].fillna("").astype(str).str.upper().to_numpy(dtype=str)
+    est_2930f = np.char.find(modeles, "2930F") >= 0
+    est_cx = (np.char.find(modeles, "6300") >= 0) | (np.char.find(modeles, "CX") >= 0)
+
+    # Familles éligibles : 2930F prioritaire, puis 6300 / CX (np.select garde le premier masque vrai)
+    masques = [est_2930f & bool(versions_hp), est_cx & bool(versions_cx)]
+
+    # Une seule recherche de version max par couple (famille, version actuelle)
+    versions_actuelles = df_switches["firmware_version"]
+    resultats = []
+    for masque, versions_famille in zip(masques, (versions_hp, versions_cx)):
+        if not masque.any():
+            resultats.append(np.full(len(df_switches), None, dtype=object))
+            continue
+
+        index_branches = build_branch_index(tuple(versions_famille))
+        table = {
+            version: max_version_from_index(version, index_branches)
+            for version in versions_actuelles[masque].dropna().unique()
+        }
+        resultats.append(versions_actuelles.map(table).to_numpy(dtype=object))
+
+    firmware_max = pd.Series(
+        np.select(masques, resultats, default=None), index=df_switches.index, dtype=object
     )
-
-    return df_switches
+    return _avec_colonnes_firmware(df_switches, firmware_max)
 
 
 def _calculer_firmware_max_swarms(
     df_vc: pd.DataFrame,
     df_aps: pd.DataFrame,
     df_vc_versions: pd.DataFrame,
-    base_url: str,
+    versions_iap: Optional[Sequence[str]],
 ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     """Ajoute la colonne firmware_max pour les swarms (VC + AP) et éventuellement la vue versions."""
-    if df_vc.empty and df_aps.empty:
-        for df in (df_vc, df_aps, df_vc_versions):
-            df["firmware_max"] = None
-        return df_vc, df_aps, df_vc_versions
+    index_branches = build_branch_index(tuple(versions_iap)) if versions_iap else None
 
-    versions_iap: Optional[List[str]] = None
-    try:
-        versions_iap = get_firmware_versions(device_type="IAP", base_url=base_url)
-    except Exception as err:  # pragma: no cover - log utilisateur
-        print("⚠️ Impossible de récupérer les versions IAP :", err)
-
-    def appliquer(df: pd.DataFrame) -> None:
-        if df.empty:
-            df["firmware_max"] = None
-        elif versions_iap:
-            df["firmware_max"] = df["firmware_version"].apply(
-                lambda current: max_version_same_branch(current, versions_iap)
-            )
-        else:
-            df["firmware_max"] = None
+    def appliquer(df: pd.DataFrame) -> pd.DataFrame:
+        if df.empty or index_branches is None:
+            return _avec_colonnes_firmware(df)
 
-    appliquer(df_vc)
-    appliquer(df_aps)
-    appliquer(df_vc_versions)
+        # Quelques versions distinctes pour potentiellement des milliers d'APs
+        cache = {
+            version: max_version_from_index(version, index_branches)
+            for version in df["firmware_version"].dropna().unique()
+        }
+        return _avec_colonnes_firmware(df, df["firmware_version"].map(cache))
 
-    return df_vc, df_aps, df_vc_versions
+    return appliquer(df_vc), appliquer(df_aps), appliquer(df_vc_versions)
 
 
 def _calculer_firmware_max_gateways(
     df_gateways: pd.DataFrame,
-    base_url: str,
+    versions_gw: Optional[Sequence[str]],
 ) -> pd.DataFrame:
     """
     Ajoute firmware_max pour les gateways en restant dans la même branche.
     """
-    if df_gateways is None or df_gateways.empty:
+    if df_gateways is None:
         return df_gateways
+    if df_gateways.empty:
+        return _avec_colonnes_firmware(df_gateways)
 
-    # S'assurer que la colonne firmware_version existe
-    if "firmware_version" not in df_gateways.columns:
-        df_gateways["firmware_version"] = None
-
-    versions_gw: Optional[List[str]] = None
-    try:
-        # Les gateways sont exposés sous le type "CONTROLLER".
-        versions_gw = get_firmware_versions(device_type="CONTROLLER", base_url=base_url)
-    except Exception as err:  # pragma: no cover - log utilisateur
-        print("⚠️ Impossible de récupérer les versions Gateway :", err)
-
-    if versions_gw:
-        def calculer_max(current: Optional[str]) -> Optional[str]:
-            if not current or pd.isna(current):
-                return None
-            # Utiliser la fonction spécialisée pour les gateways qui gère le format "8.7.0.0-2.3.0.9_85196"
-            return max_version_same_branch_gateway(str(current), versions_gw)
-
-        df_gateways["firmware_max"] = df_gateways["firmware_version"].apply(calculer_max)
-    else:
+    if not versions_gw:
         print("⚠️ Aucune version CONTROLLER disponible, firmware_max sera vide")
-        df_gateways["firmware_max"] = None
-
-    # S'assurer que la colonne firmware_max existe même si elle n'a pas été créée
-    if "firmware_max" not in df_gateways.columns:
-        df_gateways["firmware_max"] = None
+        return _avec_colonnes_firmware(df_gateways)
 
-    return df_gateways
+    # firmware_version peut manquer si aucune gateway ne la remonte : firmware_max reste vide
+    if "firmware_version" not in df_gateways.columns:
+        return _avec_colonnes_firmware(df_gateways)
+
+    # Utiliser la fonction spécialisée pour les gateways qui gère le format "8.7.0.0-2.3.0.9_85196",
+    # une seule fois par version distincte
+    index_gateways = build_gateway_branch_index(tuple(versions_gw))
+    cache = {
+        version: max_version_from_gateway_index(str(version), index_gateways) if version else None
+        for version in df_gateways["firmware_version"].dropna().unique()
+    }
+    return _avec_colonnes_firmware(df_gateways, df_gateways["firmware_version"].map(cache))
 
 
-def _preparer_gateways_consolide(df_gateways: pd.DataFrame) -> pd.DataFrame:
-    """
-    Aligne les colonnes des gateways sur la vue consolidée firmware.
+def _assembler_colonnes(
+    sources: Sequence[Tuple[pd.DataFrame, Dict[str, str]]],
+    colonnes: Sequence[str],
+    colonnes_calculees: Optional[Dict[str, np.ndarray]] = None,
+) -> pd.DataFrame:
     """
-    if df_gateways is None or df_gateways.empty:
-        return pd.DataFrame(columns=CONSOLIDE_COLONNES)
-
-    df = df_gateways.rename(columns={"macaddr": "mac_address", "name": "hostname"}).copy()
+    Construit en une seule passe la concaténation de plusieurs DataFrame, limitée à `colonnes`.
 
-    # S'assurer que toutes les colonnes requises existent
-    for col in CONSOLIDE_COLONNES:
-        if col not in df.columns:
-            df[col] = None
-
-    # Sélectionner uniquement les colonnes consolidées (firmware_max devrait être préservé)
-    df_result = df[CONSOLIDE_COLONNES].copy()
+    Chaque source est un couple (DataFrame, renommage) où le renommage associe une colonne
+    cible à son nom dans la source ; les colonnes absentes d'une source sont remplies avec None.
+    `colonnes_calculees` fournit des colonnes déjà construites sur toute la hauteur du résultat.
+    Chaque colonne du résultat est allouée une seule fois via numpy.concatenate.
+    """
+    sources = [(df, renommage) for df, renommage in sources if df is not None and len(df)]
+    if not sources:
+        return pd.DataFrame()
 
-    return df_result
+    colonnes_calculees = colonnes_calculees or {}
+    donnees: Dict[str, np.ndarray] = {}
+    for col in colonnes:
+        if col in colonnes_calculees:
+            donnees[col] = colonnes_calculees[col]
+            continue
+
+        morceaux = []
+        for df, renommage in sources:
+            source = renommage.get(col, col)
+            if source in df.columns:
+                morceaux.append(df[source].to_numpy())
+            else:
+                morceaux.append(np.full(len(df), None, dtype=object))
+        donnees[col] = np.concatenate(morceaux)
+    return pd.DataFrame(donnees, copy=False)
+
+
+def _lister_gateways_enrichis(base_url: str) -> pd.DataFrame:
+    """Liste les gateways puis les enrichit avec leur version recommandée."""
+    df_gateways = lister_gateways(base_url=base_url)
+    return enrichir_gateways_recommended(df_gateways, base_url=base_url)
 
 
 def collect_datasets(central: ArubaCentralBase, base_url: str) -> DataFramesMap:
@@ -199,85 +245,93 @@ def collect_datasets(central: ArubaCentralBase, base_url: str) -> DataFramesMap:
     Dict[str, pd.DataFrame]
         Dictionnaire contenant les DataFrame prêts à être exportés.
     """
+    # L'inventaire passe par pycentral, qui rafraîchit le token si nécessaire :
+    # il est récupéré en premier pour que les appels REST directs lisent un token valide.
     df_inventory = recuperer_inventaire(conn=central)
-    df_switches_stack = lister_switches_stack(base_url=base_url)
-    df_gateways = lister_gateways(base_url=base_url)
-    df_gateways = enrichir_gateways_recommended(df_gateways, base_url=base_url)
-    df_gateways = _calculer_firmware_max_gateways(df_gateways, base_url=base_url)
-
-    df_switch_hp = get_firmware_switch(
-        conn=central,
-        device_type="HP",
-        limit=500,
-        base_url=base_url,
-    )
-    df_switch_cx = get_firmware_switch(
-        conn=central,
-        device_type="CX",
-        limit=500,
-        base_url=base_url,
-    )
-    df_switch = _concat_frames([df_switch_hp, df_switch_cx])
-    df_switch = _calculer_firmware_max_switches(df_switch, base_url=base_url)
 
-    df_swarms_vc, df_swarms_ap, df_vc_versions = get_firmware_swarms(base_url=base_url)
+    # Les autres appels API sont indépendants : ils sont lancés en parallèle
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS_COLLECTE) as executor:
+        futur_switches_stack = executor.submit(lister_switches_stack, base_url=base_url)
+        futur_gateways = executor.submit(_lister_gateways_enrichis, base_url=base_url)
+        futur_switch_hp = executor.submit(
+            get_firmware_switch,
+            conn=central,
+            device_type="HP",
+            limit=500,
+            base_url=base_url,
+        )
+        futur_switch_cx = executor.submit(
+            get_firmware_switch,
+            conn=central,
+            device_type="CX",
+            limit=500,
+            base_url=base_url,
+        )
+        futur_swarms = executor.submit(get_firmware_swarms, base_url=base_url)
+        futurs_versions = {
+            device_type: executor.submit(_recuperer_versions, device_type, libelle, base_url)
+            for device_type, libelle in (
+                ("HP", "HP"),
+                ("CX", "CX"),
+                ("IAP", "IAP"),
+                # Les gateways sont exposés sous le type "CONTROLLER".
+                ("CONTROLLER", "Gateway"),
+            )
+        }
+
+        df_switches_stack = futur_switches_stack.result()
+        df_gateways = futur_gateways.result()
+        df_switch_hp = futur_switch_hp.result()
+        df_switch_cx = futur_switch_cx.result()
+        df_swarms_vc, df_swarms_ap, df_vc_versions = futur_swarms.result()
+        versions = {device_type: futur.result() for device_type, futur in futurs_versions.items()}
+
+    df_gateways = _calculer_firmware_max_gateways(df_gateways, versions["CONTROLLER"])
+
+    df_switch = _concat_frames(df_switch_hp, df_switch_cx)
+    df_switch = _calculer_firmware_max_switches(df_switch, versions["HP"], versions["CX"])
+
     df_swarms_vc, df_swarms_ap, df_vc_versions = _calculer_firmware_max_swarms(
         df_swarms_vc,
         df_swarms_ap,
         df_vc_versions,
-        base_url=base_url,
+        versions["IAP"],
     )
 
-    df_gateways_consolide = _preparer_gateways_consolide(df_gateways)
-
     # Consolidation : switches, VC et gateways (pas les APs individuels)
-    df_consolide = _concat_frames(
+    df_consolide = _assembler_colonnes(
         [
-            df_switch.reindex(columns=CONSOLIDE_COLONNES, copy=False)
-            if not df_switch.empty
-            else None,
-            df_swarms_vc.reindex(columns=CONSOLIDE_COLONNES, copy=False)
-            if not df_swarms_vc.empty
-            else None,
-            df_gateways_consolide if not df_gateways_consolide.empty else None,
-        ]
+            (df_switch, {}),
+            (df_swarms_vc, {}),
+            (df_gateways, GATEWAYS_VERS_CONSOLIDE),
+        ],
+        CONSOLIDE_COLONNES,
     )
 
     # Prépare un tableau combinant VC et AP pour l'onglet Firmware Swarms
-    # Ajouter les colonnes "site" et "ip_address" aux VC (vides pour les VC)
+    colonnes_sources: List[str] = ["type_entree"]
     if not df_swarms_vc.empty:
-        df_swarms_vc = df_swarms_vc.copy()
-        if "site" not in df_swarms_vc.columns:
-            df_swarms_vc["site"] = None
-        if "ip_address" not in df_swarms_vc.columns:
-            df_swarms_vc["ip_address"] = None
-    
-    df_swarms_sheet = _concat_frames(
-        [
-            df_swarms_vc.assign(type_entree="VC") if not df_swarms_vc.empty else None,
-            df_swarms_ap.assign(type_entree="AP") if not df_swarms_ap.empty else None,
-        ]
+        # Ajouter les colonnes "site" et "ip_address" aux VC (vides pour les VC)
+        colonnes_sources += [*df_swarms_vc.columns, "site", "ip_address"]
+    if not df_swarms_ap.empty:
+        colonnes_sources += list(df_swarms_ap.columns)
+    colonnes_sources = list(dict.fromkeys(colonnes_sources))
+
+    # Ordre des colonnes avec site entre model et vc_name, et ip_address après vc_name,
+    # puis les autres colonnes qui ne sont pas dans la liste
+    colonnes_finales = [col for col in SWARMS_COLONNES_ORDRE if col in colonnes_sources] + [
+        col for col in colonnes_sources if col not in SWARMS_COLONNES_ORDRE
+    ]
+    df_swarms_sheet = _assembler_colonnes(
+        [(df_swarms_vc, {}), (df_swarms_ap, {})],
+        colonnes_finales,
+        colonnes_calculees={
+            "type_entree": np.repeat(
+                np.array(["VC", "AP"], dtype=object),
+                [len(df_swarms_vc), len(df_swarms_ap)],
+            ),
+        },
     )
-    if not df_swarms_sheet.empty:
-        # Définir l'ordre des colonnes avec site entre model et vc_name, et ip_address après vc_name
-        colonnes_ordre = [
-            "type_entree",
-            "serial",
-            "mac_address",
-            "hostname",
-            "model",
-            "site",
-            "vc_name",
-            "ip_address",
-            "vc_id",
-        ]
-        # Ajouter les autres colonnes qui ne sont pas dans la liste
-        autres_colonnes = [col for col in df_swarms_sheet.columns if col not in colonnes_ordre]
-        colonnes_finales = colonnes_ordre + autres_colonnes
-        
-        # Réorganiser uniquement les colonnes qui existent dans le DataFrame
-        colonnes_existantes = [col for col in colonnes_finales if col in df_swarms_sheet.columns]
-        df_swarms_sheet = df_swarms_sheet[colonnes_existantes]
 
     return {
         "inventaire": df_inventory,
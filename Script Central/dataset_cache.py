@@ -0,0 +1,147 @@
+"""
+Cache local des jeux de données collectés pour un client.
+
+Après une collecte, chaque DataFrame de `collect_datasets` est sauvegardé dans
+`Report/.cache/` (un fichier par client et par jeu de données, remplacé à chaque collecte) ;
+sa validité dépend uniquement de son âge (`--cache-minutes`).
+Une exécution suivante peut relire ces fichiers au lieu de rappeler l'API Aruba Central,
+par exemple pour régénérer le rapport Excel après un changement de mise en forme.
+
+Les fichiers sont au format pickle de pandas (pyarrow n'est pas une dépendance du projet) :
+ils ne doivent être relus que s'ils ont été produits par ce script.
+"""
+
+import glob
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import pandas as pd
+
+
+# Jeux de données produits par data_pipeline.collect_datasets
+JEUX_DE_DONNEES = (
+    "inventaire",
+    "switches_stack",
+    "gateways",
+    "firmware_switch",
+    "firmware_swarms",
+    "firmware_consolide",
+)
+
+# Durée de validité par défaut du cache, en minutes
+DUREE_CACHE_MINUTES = 60
+
+
+def _chemin_cache(dossier_cache: Path, nom_client: str, nom_jeu: str) -> Path:
+    """Chemin du fichier de cache d'un jeu de données du client."""
+    return dossier_cache / f"{nom_client}_{nom_jeu}.pkl"
+
+
+def _supprimer_anciens_fichiers_dates(dossier_cache: Path, nom_client: str) -> None:
+    """
+    Supprime les fichiers de cache du client nommés d'après une date
+    (client_AAAA-MM-JJ_jeu.pkl), créés par les versions précédentes du cache.
+    """
+    for chemin in dossier_cache.glob(f"{glob.escape(nom_client)}_[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]_*.pkl"):
+        chemin.unlink(missing_ok=True)
+
+
+def _ecrire_pickle_atomique(dataframe: pd.DataFrame, chemin: Path) -> None:
+    """
+    Écrit le DataFrame dans un fichier temporaire du même dossier puis le renomme :
+    une exécution interrompue ne laisse jamais de fichier de cache tronqué.
+    """
+    descripteur, chemin_temporaire = tempfile.mkstemp(
+        dir=chemin.parent, prefix=f".{chemin.name}.", suffix=".tmp"
+    )
+    os.close(descripteur)
+    try:
+        dataframe.to_pickle(chemin_temporaire)
+        os.replace(chemin_temporaire, chemin)
+    except BaseException:
+        Path(chemin_temporaire).unlink(missing_ok=True)
+        raise
+
+
+def sauvegarder_jeux_de_donnees(
+    dossier_cache: Path,
+    nom_client: str,
+    jeux_de_donnees: Dict[str, Optional[pd.DataFrame]],
+) -> None:
+    """
+    Sauvegarde les jeux de données collectés dans le dossier de cache.
+
+    Parameters
+    ----------
+    dossier_cache : Path
+        Dossier où écrire les fichiers (créé si nécessaire).
+    nom_client : str
+        Nom du client, utilisé dans le nom des fichiers.
+    jeux_de_donnees : Dict[str, Optional[pd.DataFrame]]
+        Jeux de données retournés par collect_datasets.
+    """
+    dossier_cache = Path(dossier_cache)
+    try:
+        dossier_cache.mkdir(parents=True, exist_ok=True)
+        for nom_jeu in JEUX_DE_DONNEES:
+            dataframe = jeux_de_donnees.get(nom_jeu)
+            if dataframe is None:
+                dataframe = pd.DataFrame()
+            _ecrire_pickle_atomique(dataframe, _chemin_cache(dossier_cache, nom_client, nom_jeu))
+        _supprimer_anciens_fichiers_dates(dossier_cache, nom_client)
+    except OSError as err:
+        # Le cache est facultatif : un échec d'écriture ne doit pas empêcher l'export
+        print(f"⚠️ Impossible de mettre les données en cache : {err}")
+        return
+
+    print(f"💾 Données mises en cache dans : {dossier_cache}")
+
+
+def charger_jeux_de_donnees(
+    dossier_cache: Path,
+    nom_client: str,
+    duree_max_minutes: float = DUREE_CACHE_MINUTES,
+) -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    Relit les jeux de données du client s'ils ont été mis en cache récemment.
+
+    Parameters
+    ----------
+    dossier_cache : Path
+        Dossier contenant les fichiers de cache.
+    nom_client : str
+        Nom du client.
+    duree_max_minutes : float
+        Âge maximal des fichiers de cache, en minutes.
+
+    Returns
+    -------
+    Optional[Dict[str, pd.DataFrame]]
+        Jeux de données relus, ou None si un fichier manque, est trop ancien ou illisible.
+    """
+    limite = time.time() - duree_max_minutes * 60
+    chemins = {
+        nom_jeu: _chemin_cache(Path(dossier_cache), nom_client, nom_jeu)
+        for nom_jeu in JEUX_DE_DONNEES
+    }
+
+    for chemin in chemins.values():
+        try:
+            if chemin.stat().st_mtime < limite:
+                return None
+        except FileNotFoundError:
+            return None
+
+    try:
+        jeux_de_donnees = {nom_jeu: pd.read_pickle(chemin) for nom_jeu, chemin in chemins.items()}
+    except Exception as err:
+        # Fichier tronqué, corrompu ou écrit par une autre version de pandas :
+        # traité comme une absence de cache (recollecte depuis l'API)
+        print(f"⚠️ Cache illisible, il sera ignoré : {type(err).__name__}: {err}")
+        return None
+
+    print(f"💾 Données relues depuis le cache : {dossier_cache}")
+    return jeux_de_donnees
@@ -5,16 +5,33 @@ Ce module permet d'envoyer le rapport Excel généré par email.
 Les paramètres de configuration email sont chargés depuis le fichier .env du client.
 """
 
-import os
 import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
+from email.message import EmailMessage
 from typing import Dict, List, Optional
 from pathlib import Path
 
 
+# Type MIME d'un classeur Excel (.xlsx)
+XLSX_MAINTYPE = "application"
+XLSX_SUBTYPE = "vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Corps des emails de rapport, complété avec le nom du client et du fichier
+CORPS_MESSAGE = """
+Bonjour,
+
+Veuillez trouver ci-joint le rapport Aruba Central pour le client {nom_client}.
+
+Fichier : {nom_fichier}
+
+Ce rapport a été généré automatiquement et contient :
+- L'inventaire des équipements
+- Les informations de firmware consolidées
+
+Cordialement,
+Système de génération de rapports Aruba Central
+"""
+
+
 def charger_config_email(nom_client: str) -> Optional[Dict[str, str]]:
     """
     Charge la configuration email depuis le fichier .env du client.
@@ -29,18 +46,15 @@ def charger_config_email(nom_client: str) -> Optional[Dict[str, str]]:
     Optional[Dict[str, str]]
         Dictionnaire contenant la configuration email, ou None si non configuré.
     """
-    from dotenv import dotenv_values
-    from clients_config import CLIENTS
+    from clients_config import CLIENTS, charger_env_client
     
     if nom_client not in CLIENTS:
         return None
     
-    chemin_env = CLIENTS[nom_client]
-    if not os.path.exists(chemin_env):
+    valeurs_env = charger_env_client(nom_client)
+    if valeurs_env is None:
         return None
     
-    valeurs_env = dotenv_values(chemin_env)
-    
     # Paramètres email optionnels
     config_email = {
         "smtp_server": valeurs_env.get("SMTP_SERVER"),
@@ -60,6 +74,143 @@ def charger_config_email(nom_client: str) -> Optional[Dict[str, str]]:
     return config_email
 
 
+class EmailSender:
+    """
+    Connexion SMTP réutilisable pour envoyer plusieurs rapports.
+
+    La connexion (et la négociation TLS / l'authentification) est ouverte une seule fois
+    à l'entrée du bloc ``with`` et fermée à sa sortie. Le contenu des pièces jointes est
+    conservé, un même fichier envoyé à plusieurs clients n'est lu qu'une fois.
+
+    Exemple
+    -------
+    >>> with EmailSender(config_email) as sender:
+    ...     sender.envoyer("Report/Client1.xlsx", "Client1")
+    ...     sender.envoyer("Report/Client2.xlsx", "Client2", config_email_client2)
+    """
+
+    def __init__(self, config_email: Dict[str, str]) -> None:
+        self.config_email = config_email
+        self._serveur: Optional[smtplib.SMTP] = None
+        self._pieces_jointes: Dict[str, bytes] = {}
+
+    def __enter__(self) -> "EmailSender":
+        smtp_port = int(self.config_email["smtp_port"])
+        smtp_server = self.config_email["smtp_server"]
+
+        print(f"📧 Connexion au serveur SMTP : {smtp_server}:{smtp_port}")
+
+        serveur = smtplib.SMTP(smtp_server, smtp_port)
+        try:
+            # Utiliser TLS si le port est 587
+            if smtp_port == 587:
+                serveur.starttls()
+
+            # Authentification si nécessaire
+            if self.config_email.get("smtp_username") and self.config_email.get("smtp_password"):
+                serveur.login(self.config_email["smtp_username"], self.config_email["smtp_password"])
+        except Exception:
+            serveur.close()
+            raise
+
+        self._serveur = serveur
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        serveur, self._serveur = self._serveur, None
+        if serveur is None:
+            return
+        try:
+            serveur.quit()
+        except smtplib.SMTPException:
+            serveur.close()
+
+    def _contenu_piece_jointe(self, fichier_excel: str) -> bytes:
+        """Retourne le contenu du fichier à joindre, lu une seule fois par fichier."""
+        contenu = self._pieces_jointes.get(fichier_excel)
+        if contenu is None:
+            with open(fichier_excel, "rb") as fichier:
+                contenu = fichier.read()
+            self._pieces_jointes[fichier_excel] = contenu
+        return contenu
+
+    def envoyer(
+        self,
+        fichier_excel: str,
+        nom_client: str,
+        config_email: Optional[Dict[str, str]] = None,
+    ) -> bool:
+        """
+        Envoie un email avec le fichier Excel en pièce jointe sur la connexion ouverte.
+
+        Parameters
+        ----------
+        fichier_excel : str
+            Chemin vers le fichier Excel à envoyer.
+        nom_client : str
+            Nom du client (utilisé dans le corps de l'email).
+        config_email : Optional[Dict[str, str]]
+            Configuration du client (destinataires, sujet). Par défaut, celle
+            utilisée pour ouvrir la connexion.
+
+        Returns
+        -------
+        bool
+            True si l'email a été envoyé avec succès, False sinon.
+        """
+        if self._serveur is None:
+            raise RuntimeError("EmailSender doit être utilisé dans un bloc 'with'.")
+
+        config_email = config_email or self.config_email
+
+        chemin_excel = Path(fichier_excel)
+        if not chemin_excel.is_file():
+            print(f"❌ Le fichier Excel est introuvable : {fichier_excel}")
+            return False
+        
+        try:
+            # Création du message
+            msg = EmailMessage()
+            msg["From"] = config_email["email_from"]
+            msg["To"] = config_email["email_to"]
+            
+            if config_email.get("email_cc"):
+                msg["Cc"] = config_email["email_cc"]
+            
+            msg["Subject"] = config_email["email_subject"]
+            
+            # Corps du message
+            nom_fichier = chemin_excel.name
+            corps_message = CORPS_MESSAGE.format(nom_client=nom_client, nom_fichier=nom_fichier)
+            msg.set_content(corps_message)
+            
+            # Pièce jointe, avec le type MIME d'un classeur Excel (.xlsx)
+            msg.add_attachment(
+                self._contenu_piece_jointe(fichier_excel),
+                maintype=XLSX_MAINTYPE,
+                subtype=XLSX_SUBTYPE,
+                filename=nom_fichier,
+            )
+            
+            # Préparer la liste des destinataires
+            destinataires = [config_email["email_to"]]
+            if config_email.get("email_cc"):
+                destinataires.extend([email.strip() for email in config_email["email_cc"].split(",")])
+            
+            # Envoi de l'email
+            self._serveur.send_message(msg, to_addrs=destinataires)
+            
+            print(f"✅ Email envoyé avec succès à : {', '.join(destinataires)}")
+            return True
+            
+        except smtplib.SMTPException as e:
+            print(f"❌ Erreur SMTP lors de l'envoi de l'email : {str(e)}")
+            return False
+        except Exception as e:
+            print(f"❌ Erreur lors de l'envoi de l'email : {str(e)}")
+            return False
+
+
 def envoyer_email_avec_piece_jointe(
     fichier_excel: str,
     nom_client: str,
@@ -67,6 +218,9 @@ def envoyer_email_avec_piece_jointe(
 ) -> bool:
     """
     Envoie un email avec le fichier Excel en pièce jointe.
+
+    Ouvre une connexion SMTP le temps d'un seul envoi ; pour envoyer plusieurs
+    rapports sur le même serveur, utiliser directement EmailSender.
     
     Parameters
     ----------
@@ -82,76 +236,13 @@ def envoyer_email_avec_piece_jointe(
     bool
         True si l'email a été envoyé avec succès, False sinon.
     """
-    if not os.path.exists(fichier_excel):
+    if not Path(fichier_excel).is_file():
         print(f"❌ Le fichier Excel est introuvable : {fichier_excel}")
         return False
     
     try:
-        # Création du message
-        msg = MIMEMultipart()
-        msg["From"] = config_email["email_from"]
-        msg["To"] = config_email["email_to"]
-        
-        if config_email.get("email_cc"):
-            msg["Cc"] = config_email["email_cc"]
-        
-        msg["Subject"] = config_email["email_subject"]
-        
-        # Corps du message
-        nom_fichier = os.path.basename(fichier_excel)
-        corps_message = f"""
-Bonjour,
-
-Veuillez trouver ci-joint le rapport Aruba Central pour le client {nom_client}.
-
-Fichier : {nom_fichier}
-
-Ce rapport a été généré automatiquement et contient :
-- L'inventaire des équipements
-- Les informations de firmware consolidées
-
-Cordialement,
-Système de génération de rapports Aruba Central
-"""
-        msg.attach(MIMEText(corps_message, "plain", "utf-8"))
-        
-        # Pièce jointe
-        with open(fichier_excel, "rb") as fichier:
-            piece_jointe = MIMEBase("application", "octet-stream")
-            piece_jointe.set_payload(fichier.read())
-        
-        encoders.encode_base64(piece_jointe)
-        piece_jointe.add_header(
-            "Content-Disposition",
-            f'attachment; filename= "{nom_fichier}"',
-        )
-        msg.attach(piece_jointe)
-        
-        # Connexion au serveur SMTP et envoi
-        smtp_port = int(config_email["smtp_port"])
-        smtp_server = config_email["smtp_server"]
-        
-        print(f"📧 Connexion au serveur SMTP : {smtp_server}:{smtp_port}")
-        
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            # Utiliser TLS si le port est 587
-            if smtp_port == 587:
-                server.starttls()
-            
-            # Authentification si nécessaire
-            if config_email.get("smtp_username") and config_email.get("smtp_password"):
-                server.login(config_email["smtp_username"], config_email["smtp_password"])
-            
-            # Préparer la liste des destinataires
-            destinataires = [config_email["email_to"]]
-            if config_email.get("email_cc"):
-                destinataires.extend([email.strip() for email in config_email["email_cc"].split(",")])
-            
-            # Envoi de l'email
-            server.send_message(msg, to_addrs=destinataires)
-        
-        print(f"✅ Email envoyé avec succès à : {', '.join(destinataires)}")
-        return True
+        with EmailSender(config_email) as sender:
+            return sender.envoyer(fichier_excel, nom_client)
         
     except smtplib.SMTPException as e:
         print(f"❌ Erreur SMTP lors de l'envoi de l'email : {str(e)}")
@@ -159,4 +250,3 @@ Système de génération de rapports Aruba Central
     except Exception as e:
         print(f"❌ Erreur lors de l'envoi de l'email : {str(e)}")
         return False
-
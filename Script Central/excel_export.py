@@ -4,12 +4,127 @@ Fonctions utilitaires pour générer le rapport Excel.
 
 from __future__ import annotations
 
-import os
-from typing import Dict, Iterable
+import math
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from numbers import Real
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
 
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype
 
-from excel_format import formater_excel
+from excel_format import formater_excel, formats_dates
+
+
+# Options du classeur xlsxwriter
+OPTIONS_XLSXWRITER = {
+    "constant_memory": True,
+    "strings_to_urls": False,
+    "strings_to_numbers": False,
+    "strings_to_formulas": False,
+    # Les dates avec fuseau horaire sont écrites en heure locale du fuseau
+    "remove_timezone": True,
+}
+
+# Types écrits directement par ``write`` de xlsxwriter (bool est un int)
+_TYPES_ECRITS_TELS_QUELS = (str, bool, int, date, time, timedelta)
+
+# Feuilles du rapport, dans l'ordre : (clé du jeu de données, nom de la feuille)
+ORDRE_FEUILLES: Tuple[Tuple[str, str], ...] = (
+    ("firmware_consolide", "Firmware Consolidé"),
+    ("inventaire", "Inventaire"),
+    ("switches_stack", "Switches (Stack)"),
+    ("gateways", "Gateways"),
+    ("firmware_switch", "Firmware Switch"),
+    ("firmware_swarms", "Firmware Swarms"),
+)
+
+
+def valeur_excel(valeur: Any) -> Any:
+    """
+    Retourne une valeur acceptée par ``write`` de xlsxwriter (conversion partagée avec excel_rapide).
+
+    Comme ``DataFrame.to_excel``, les infinis sont écrits sous forme de texte (``inf``, ``-inf``)
+    et les valeurs d'un autre type (listes, dictionnaires...) par leur représentation texte.
+    """
+    if valeur is None or isinstance(valeur, _TYPES_ECRITS_TELS_QUELS):
+        return valeur
+    if isinstance(valeur, (Real, Decimal)):
+        return valeur if math.isfinite(valeur) else str(float(valeur))
+    return str(valeur)
+
+
+def format_colonne_objet(valeurs: list, format_cellule, format_date_heure, format_date):
+    """
+    Format d'une colonne ``object`` : format de date si elle ne contient que des dates.
+
+    Les formats peuvent être des formats xlsxwriter ou les styles XML d'excel_rapide.
+    """
+    dates = [valeur for valeur in valeurs if valeur is not None and valeur != ""]
+    if dates and all(isinstance(valeur, datetime) for valeur in dates):
+        return format_date_heure
+    if dates and all(type(valeur) is date for valeur in dates):
+        return format_date
+    return format_cellule
+
+
+def _preparer_colonnes(
+    worksheet,
+    dataframe: pd.DataFrame,
+    format_cellule,
+    format_date_heure,
+    format_date,
+) -> List[Tuple[list, Callable, Any]]:
+    """
+    Convertit une seule fois chaque colonne en liste de valeurs Python natives
+    et choisit la méthode d'écriture xlsxwriter et le format adaptés à son contenu.
+
+    Les colonnes numériques gardent leur type (les valeurs manquantes deviennent ``None``),
+    les autres colonnes sont remplies avec ``""``. Une colonne homogène (nombres finis, booléens
+    ou textes non vides, sans valeur manquante) est écrite avec la méthode typée correspondante,
+    ce qui évite la détection du type cellule par cellule de ``write`` ; les autres colonnes
+    gardent ``write`` (qui écrit notamment ``None`` et ``""`` comme cellules vides), après
+    conversion des valeurs qu'il n'accepte pas (voir ``valeur_excel``).
+    Les colonnes de dates reçoivent un format de date, sinon Excel n'afficherait que des nombres.
+    """
+    colonnes = []
+    for _, serie in dataframe.items():
+        if is_datetime64_any_dtype(serie.dtype):
+            valeurs = serie.astype(object).where(serie.notna(), None).tolist()
+            colonnes.append((valeurs, worksheet.write, format_date_heure))
+            continue
+
+        numerique = is_numeric_dtype(serie.dtype)
+        manquantes = serie.hasnans
+        infinis = (
+            numerique
+            and not is_bool_dtype(serie.dtype)
+            and bool(np.isinf(serie.to_numpy(dtype=float, na_value=np.nan)).any())
+        )
+        if manquantes:
+            serie = serie.astype(object).where(serie.notna(), None if numerique else "")
+        valeurs = serie.tolist()
+
+        format_colonne = format_cellule
+        if is_bool_dtype(serie.dtype) and not manquantes:
+            ecrire = worksheet.write_boolean
+        elif numerique and not manquantes and not infinis:
+            ecrire = worksheet.write_number
+        elif numerique:
+            valeurs = [valeur_excel(valeur) for valeur in valeurs]
+            ecrire = worksheet.write
+        elif not manquantes and all(type(valeur) is str and valeur for valeur in valeurs):
+            ecrire = worksheet.write_string
+        else:
+            valeurs = [valeur_excel(valeur) for valeur in valeurs]
+            format_colonne = format_colonne_objet(
+                valeurs, format_cellule, format_date_heure, format_date
+            )
+            ecrire = worksheet.write
+        colonnes.append((valeurs, ecrire, format_colonne))
+    return colonnes
 
 
 def _ecrire_feuille(
@@ -21,12 +136,42 @@ def _ecrire_feuille(
     if dataframe is None or dataframe.empty:
         return
 
-    dataframe.to_excel(writer, sheet_name=sheet_name, index=False)
-    formater_excel(writer, sheet_name)
+    ecrire_feuille(writer, sheet_name, dataframe)
     print(f"✅ Données {sheet_name} ajoutées à l'Excel.")
 
 
-def export_to_excel(fichier_excel: str, dataframes: Dict[str, pd.DataFrame]) -> None:
+def ecrire_feuille(writer: pd.ExcelWriter, sheet_name: str, dataframe: pd.DataFrame) -> None:
+    """
+    Écrit un DataFrame dans une nouvelle feuille formatée (voir excel_format.formater_excel).
+
+    Parameters
+    ----------
+    writer : pd.ExcelWriter
+        ExcelWriter de pandas ouvert avec le moteur xlsxwriter.
+    sheet_name : str
+        Nom de la feuille à créer.
+    dataframe : pd.DataFrame
+        Données à écrire, en-têtes compris.
+    """
+    # En mode constant_memory, la mise en forme des colonnes précède l'écriture des lignes,
+    # qui sont écrites une à une dans l'ordre (DataFrame.to_excel écrit colonne par colonne).
+    ws = writer.book.add_worksheet(sheet_name)
+    format_entete, format_cellule = formater_excel(writer, sheet_name, dataframe)
+    format_date_heure, format_date = formats_dates(writer)
+
+    ws.write_row(0, 0, [str(colonne) for colonne in dataframe.columns], format_entete)
+    colonnes = _preparer_colonnes(ws, dataframe, format_cellule, format_date_heure, format_date)
+    ecritures = [(ecrire, format_colonne) for _, ecrire, format_colonne in colonnes]
+    for index_ligne, ligne in enumerate(zip(*(valeurs for valeurs, _, _ in colonnes)), start=1):
+        for index_colonne, ((ecrire, format_colonne), valeur) in enumerate(zip(ecritures, ligne)):
+            ecrire(index_ligne, index_colonne, valeur, format_colonne)
+
+
+def export_to_excel(
+    fichier_excel: str,
+    dataframes: Dict[str, pd.DataFrame],
+    rapide: bool = False,
+) -> None:
     """
     Exporte les DataFrame fournis dans un fichier Excel structuré.
 
@@ -36,21 +181,36 @@ def export_to_excel(fichier_excel: str, dataframes: Dict[str, pd.DataFrame]) ->
         Chemin de sortie du fichier Excel.
     dataframes : Dict[str, pd.DataFrame]
         Dictionnaire contenant les différents jeux de données à exporter.
+    rapide : bool
+        Si True, écrit directement le XML des feuilles (voir excel_rapide) :
+        beaucoup plus rapide sur les gros inventaires, mais sans bordures
+        ni ajustement de la largeur des colonnes.
     """
-    os.makedirs(os.path.dirname(fichier_excel), exist_ok=True)
+    chemin_excel = Path(fichier_excel)
+    chemin_excel.parent.mkdir(parents=True, exist_ok=True)
 
-    ordre_feuilles: Iterable[tuple[str, str]] = (
-        ("firmware_consolide", "Firmware Consolidé"),
-        ("inventaire", "Inventaire"),
-        ("switches_stack", "Switches (Stack)"),
-        ("gateways", "Gateways"),
-        ("firmware_switch", "Firmware Switch"),
-        ("firmware_swarms", "Firmware Swarms"),
-    )
+    if rapide:
+        # Import local : excel_rapide réutilise les conversions de valeurs de ce module
+        from excel_rapide import ecrire_classeur_xml
 
-    with pd.ExcelWriter(fichier_excel, engine="openpyxl") as writer:
-        for cle, sheet_name in ordre_feuilles:
-            _ecrire_feuille(writer, sheet_name, dataframes.get(cle))
+        feuilles = [
+            (sheet_name, dataframes[cle])
+            for cle, sheet_name in ORDRE_FEUILLES
+            if dataframes.get(cle) is not None and not dataframes[cle].empty
+        ]
+        ecrire_classeur_xml(chemin_excel, feuilles)
+        print("✅ Export terminé dans :", chemin_excel.resolve())
+        return
 
-    print("✅ Export terminé dans :", os.path.abspath(fichier_excel))
+    # xlsxwriter en mode constant_memory : les lignes sont écrites sur disque au fil de l'eau
+    # au lieu de garder toutes les cellules du classeur en mémoire.
+    # Les textes sont écrits tels quels : pas de conversion en URL, en nombre ou en formule.
+    with pd.ExcelWriter(
+        chemin_excel,
+        engine="xlsxwriter",
+        engine_kwargs={"options": OPTIONS_XLSXWRITER},
+    ) as writer:
+        for cle, sheet_name in ORDRE_FEUILLES:
+            _ecrire_feuille(writer, sheet_name, dataframes.get(cle))
 
+    print("✅ Export terminé dans :", chemin_excel.resolve())
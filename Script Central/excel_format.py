@@ -6,73 +6,115 @@ Ce module applique un formatage professionnel aux feuilles Excel :
 - En-têtes en gras
 - Ajustement automatique de la largeur des colonnes
 - Filtres automatiques sur la première ligne
+
+Le classeur est écrit avec xlsxwriter en mode ``constant_memory`` : les lignes sont
+envoyées sur disque au fur et à mesure et ne peuvent plus être modifiées ensuite.
+La mise en forme est donc préparée à partir du DataFrame, avant l'écriture des données.
 """
 
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font, Border, Side
+from itertools import groupby
+from typing import Any, List, Tuple
+from weakref import WeakKeyDictionary
+
+import numpy as np
+import pandas as pd
+
+
+# Styles partagés par toutes les feuilles : bordure fine, en-têtes en gras
+STYLE_CELLULE = {"border": 1}
+STYLE_ENTETE = {"bold": True, "border": 1}
+
+# Colonnes de dates : même bordure, avec un format d'affichage (formats par défaut de pandas)
+STYLE_DATE_HEURE = {"border": 1, "num_format": "yyyy-mm-dd hh:mm:ss"}
+STYLE_DATE = {"border": 1, "num_format": "yyyy-mm-dd"}
+
+# Formats déjà enregistrés pour chaque classeur (un seul jeu de formats par fichier)
+_FORMATS_PAR_CLASSEUR: "WeakKeyDictionary[Any, Tuple[Any, ...]]" = WeakKeyDictionary()
+
+
+def _formats_classeur(workbook) -> Tuple[Any, ...]:
+    """
+    Retourne les formats (en-tête, cellule, date et heure, date) du classeur,
+    créés une seule fois.
+    """
+    formats = _FORMATS_PAR_CLASSEUR.get(workbook)
+    if formats is None:
+        formats = tuple(
+            workbook.add_format(style)
+            for style in (STYLE_ENTETE, STYLE_CELLULE, STYLE_DATE_HEURE, STYLE_DATE)
+        )
+        _FORMATS_PAR_CLASSEUR[workbook] = formats
+    return formats
+
+
+def formats_dates(writer) -> Tuple[Any, Any]:
+    """
+    Retourne les formats xlsxwriter des cellules de dates du classeur :
+    (date et heure, date seule), avec la même bordure que les autres cellules.
+    """
+    _, _, format_date_heure, format_date = _formats_classeur(writer.book)
+    return format_date_heure, format_date
+
+
+def _calculer_largeurs(dataframe: pd.DataFrame) -> List[int]:
+    """
+    Calcule la largeur de chaque colonne à partir du contenu le plus long
+    (en-tête compris), plus 2 caractères de marge.
+    """
+    # Une opération vectorisée par colonne plutôt qu'un appel Python par cellule
+    textes = dataframe.astype(str).where(dataframe.notna(), "")
+    longueurs_max = textes.apply(lambda colonne: colonne.str.len().max()).fillna(0)
+    longueurs_entetes = dataframe.columns.astype(str).str.len().to_numpy()
+    return (np.maximum(longueurs_entetes, longueurs_max.to_numpy(dtype=int)) + 2).tolist()
 
 
-def formater_excel(writer, nom_feuille):
+def formater_excel(writer, nom_feuille, dataframe) -> Tuple[Any, Any]:
     """
     Applique un formatage professionnel à une feuille Excel.
-    
+
     Cette fonction améliore la lisibilité du fichier Excel en ajoutant :
     - Des bordures sur toutes les cellules
     - Des en-têtes en gras
     - Un ajustement automatique de la largeur des colonnes
     - Des filtres automatiques sur la première ligne
-    
+
+    Elle doit être appelée avant l'écriture des lignes de la feuille.
+
     Parameters
     ----------
     writer : pd.ExcelWriter
-        Objet ExcelWriter de pandas utilisé pour écrire dans le fichier Excel
+        Objet ExcelWriter de pandas (moteur xlsxwriter) utilisé pour écrire dans le fichier Excel
     nom_feuille : str
         Nom de la feuille à formater (doit correspondre à une feuille existante)
+    dataframe : pd.DataFrame
+        Données qui seront écrites dans la feuille
+
+    Returns
+    -------
+    Tuple[Format, Format]
+        Formats xlsxwriter à utiliser pour la ligne d'en-têtes et pour les cellules de données.
     """
     # Récupération de la feuille de travail (worksheet) correspondant au nom fourni
     ws = writer.sheets[nom_feuille]
 
-    # Définition d'un style de bordure fine pour toutes les cellules
-    # Cela améliore la lisibilité en séparant visuellement chaque cellule
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-
-    # Parcours de toutes les cellules de la feuille
-    for row in ws.iter_rows():
-        for cell in row:
-            # Application des bordures à chaque cellule
-            cell.border = thin_border
-            # Mise en gras de la première ligne (en-têtes)
-            if cell.row == 1:
-                cell.font = Font(bold=True)
-
-    # Ajustement automatique de la largeur de chaque colonne
-    # La largeur est calculée en fonction du contenu le plus long de la colonne
-    for col in ws.columns:
-        max_length = 0
-        # Conversion du numéro de colonne en lettre (ex: 1 -> A, 2 -> B)
-        col_letter = get_column_letter(col[0].column)
-        
-        # Parcours de toutes les cellules de la colonne pour trouver la longueur maximale
-        for cell in col:
-            try:
-                if cell.value:
-                    # Calcul de la longueur du contenu (converti en string)
-                    max_length = max(max_length, len(str(cell.value)))
-            except:
-                # Ignorer les erreurs potentielles (cellules vides, formats spéciaux, etc.)
-                pass
-        
-        # Définition de la largeur de la colonne = longueur max + 2 caractères de marge
-        ws.column_dimensions[col_letter].width = max_length + 2
+    # Bordure fine sur toutes les cellules, en-têtes en gras
+    format_entete, format_cellule, _, _ = _formats_classeur(writer.book)
+
+    # Ajustement de la largeur de chaque colonne en fonction de son contenu le plus long :
+    # les colonnes contiguës de même largeur partagent une seule plage set_column
+    # (la bordure reste portée par les cellules écrites, pas par la colonne entière,
+    # pour ne pas encadrer les lignes vides sous le tableau)
+    index_colonne = 0
+    for largeur, groupe in groupby(_calculer_largeurs(dataframe)):
+        nombre = len(list(groupe))
+        ws.set_column(index_colonne, index_colonne + nombre - 1, largeur)
+        index_colonne += nombre
 
     # Ajout des filtres automatiques sur la première ligne
     # Les filtres permettent de trier et filtrer les données directement dans Excel
-    # On vérifie qu'il y a au moins 2 lignes (en-tête + données) avant d'ajouter les filtres
-    if ws.max_row > 1:
-        # Définition de la plage de filtres : de A1 à la dernière cellule de données
-        ws.auto_filter.ref = f"A1:{get_column_letter(ws.max_column)}{ws.max_row}"
\ No newline at end of file
+    # On vérifie qu'il y a au moins une ligne de données avant d'ajouter les filtres
+    if len(dataframe) > 0:
+        # Plage de filtres : de A1 à la dernière cellule de données
+        ws.autofilter(0, 0, len(dataframe), len(dataframe.columns) - 1)
+
+    return format_entete, format_cellule
@@ -0,0 +1,278 @@
+"""
+Écriture directe d'un fichier .xlsx (XML + ZIP), sans xlsxwriter.
+
+Pour les très gros inventaires, le XML de chaque feuille est généré ligne par ligne
+à partir des colonnes du DataFrame et compressé au fil de l'eau dans l'archive :
+aucun objet cellule n'est créé, le coût se limite presque à la compression.
+
+La mise en forme est réduite au strict nécessaire (en-têtes en gras, filtres automatiques,
+format des dates) : les bordures et la largeur des colonnes restent réservées à l'export xlsxwriter.
+Les valeurs sont converties comme dans l'export xlsxwriter (voir excel_export.valeur_excel).
+"""
+
+import math
+import re
+import zipfile
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Iterator, List, Sequence, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype
+
+from excel_export import format_colonne_objet, valeur_excel
+
+
+# Nombre de lignes XML regroupées avant chaque écriture dans l'archive
+LIGNES_PAR_BLOC = 1000
+
+# Caractères de contrôle interdits en XML 1.0 (retirés des textes)
+_CARACTERES_INTERDITS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+_ENTETE_XML = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+# Origine des numéros de série des dates Excel (calendrier 1900)
+_EPOQUE_EXCEL = datetime(1899, 12, 30)
+
+# Styles : 0 = cellule standard, 1 = en-tête en gras, 2 = date et heure, 3 = date
+# (mêmes formats de dates que l'export xlsxwriter, voir excel_format)
+_STYLE_DATE_HEURE = ' s="2"'
+_STYLE_DATE = ' s="3"'
+_STYLES_XML = (
+    _ENTETE_XML
+    + f'<styleSheet xmlns="{_NS_MAIN}">'
+    '<numFmts count="2"><numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm:ss"/>'
+    '<numFmt numFmtId="165" formatCode="yyyy-mm-dd"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    "</styleSheet>"
+)
+
+
+def _lettre_colonne(index: int) -> str:
+    """Convertit un index de colonne (0 = A) en lettres Excel."""
+    lettres = ""
+    index += 1
+    while index:
+        index, reste = divmod(index - 1, 26)
+        lettres = chr(65 + reste) + lettres
+    return lettres
+
+
+def _texte_xml(valeur: Any) -> str:
+    """Échappe un texte pour l'insérer dans le XML de la feuille."""
+    return escape(_CARACTERES_INTERDITS.sub("", str(valeur)))
+
+
+def _numero_serie(valeur: Any) -> float:
+    """
+    Convertit une date, une heure ou une durée en numéro de série Excel
+    (même calcul que xlsxwriter ; le fuseau horaire éventuel est ignoré).
+    """
+    if isinstance(valeur, datetime):
+        delta = valeur.replace(tzinfo=None) - _EPOQUE_EXCEL
+    elif isinstance(valeur, date):
+        delta = datetime.combine(valeur, time()) - _EPOQUE_EXCEL
+    elif isinstance(valeur, time):
+        delta = datetime.combine(_EPOQUE_EXCEL, valeur) - _EPOQUE_EXCEL
+    else:
+        delta = valeur
+    return delta.days + (float(delta.seconds) + float(delta.microseconds) / 1e6) / (60 * 60 * 24)
+
+
+def _cellule(reference: str, valeur: Any, style: str = "") -> str:
+    """
+    Retourne le XML d'une cellule selon le type de la valeur
+    (``None`` et ``""`` donnent une cellule vide, comme ``write`` de xlsxwriter).
+    """
+    if valeur is None or valeur == "":
+        return ""
+    type_valeur = type(valeur)
+    if type_valeur is bool:
+        return f'<c r="{reference}"{style} t="b"><v>{int(valeur)}</v></c>'
+    if type_valeur in (int, float) and math.isfinite(valeur):
+        return f'<c r="{reference}"{style}><v>{valeur:.16G}</v></c>'
+
+    if type_valeur is not str:
+        # Infinis, listes, dictionnaires... convertis comme dans l'export xlsxwriter
+        valeur = valeur_excel(valeur)
+        if isinstance(valeur, (date, time, timedelta)):
+            return f'<c r="{reference}"{style}><v>{_numero_serie(valeur):.16G}</v></c>'
+        if isinstance(valeur, (int, float, Decimal)):
+            return f'<c r="{reference}"{style}><v>{valeur:.16G}</v></c>'
+    return (
+        f'<c r="{reference}"{style} t="inlineStr">'
+        f'<is><t xml:space="preserve">{_texte_xml(valeur)}</t></is></c>'
+    )
+
+
+def _colonnes_natives(dataframe: pd.DataFrame) -> List[Tuple[list, str]]:
+    """
+    Convertit chaque colonne en liste de valeurs Python natives,
+    les valeurs manquantes devenant ``None``, et retourne le style de ses cellules
+    (format de date pour les colonnes de dates, comme l'export xlsxwriter).
+    """
+    colonnes = []
+    for _, serie in dataframe.items():
+        dates = is_datetime64_any_dtype(serie.dtype)
+        numerique = is_numeric_dtype(serie.dtype)
+        if serie.hasnans:
+            serie = serie.astype(object).where(serie.notna(), None)
+        elif not numerique:
+            serie = serie.astype(object)
+        valeurs = serie.tolist()
+
+        if dates:
+            style = _STYLE_DATE_HEURE
+        elif numerique:
+            style = ""
+        else:
+            style = format_colonne_objet(valeurs, "", _STYLE_DATE_HEURE, _STYLE_DATE)
+        colonnes.append((valeurs, style))
+    return colonnes
+
+
+def _xml_feuille(dataframe: pd.DataFrame) -> Iterator[str]:
+    """Génère le XML d'une feuille par blocs de lignes."""
+    lettres = [_lettre_colonne(index) for index in range(len(dataframe.columns))]
+    derniere_cellule = f"{lettres[-1]}{len(dataframe) + 1}"
+
+    yield (
+        _ENTETE_XML
+        + f'<worksheet xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}">'
+        f'<dimension ref="A1:{derniere_cellule}"/><sheetData>'
+    )
+    yield '<row r="1">' + "".join(
+        _cellule(f"{lettre}1", str(colonne), ' s="1"')
+        for lettre, colonne in zip(lettres, dataframe.columns)
+    ) + "</row>"
+
+    colonnes = _colonnes_natives(dataframe)
+    styles = [style for _, style in colonnes]
+    bloc: List[str] = []
+    for numero, ligne in enumerate(zip(*(valeurs for valeurs, _ in colonnes)), start=2):
+        cellules = "".join(
+            _cellule(f"{lettre}{numero}", valeur, style)
+            for lettre, valeur, style in zip(lettres, ligne, styles)
+        )
+        bloc.append(f'<row r="{numero}">{cellules}</row>')
+        if len(bloc) >= LIGNES_PAR_BLOC:
+            yield "".join(bloc)
+            bloc = []
+    if bloc:
+        yield "".join(bloc)
+
+    yield f'</sheetData><autoFilter ref="A1:{derniere_cellule}"/></worksheet>'
+
+
+def _xml_classeur(feuilles: Sequence[Tuple[str, pd.DataFrame]]) -> str:
+    """XML du classeur : liste des feuilles et plages des filtres automatiques."""
+    xml_feuilles = "".join(
+        f"<sheet name={quoteattr(nom)} sheetId=\"{index}\" r:id=\"rId{index}\"/>"
+        for index, (nom, _) in enumerate(feuilles, start=1)
+    )
+    noms_definis = "".join(
+        f'<definedName name="_xlnm._FilterDatabase" localSheetId="{index}" hidden="1">'
+        + escape("'" + nom.replace("'", "''") + "'")
+        + f"!$A$1:${_lettre_colonne(len(df.columns) - 1)}${len(df) + 1}</definedName>"
+        for index, (nom, df) in enumerate(feuilles)
+        if len(df.columns)
+    )
+    return (
+        _ENTETE_XML
+        + f'<workbook xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}">'
+        f"<sheets>{xml_feuilles}</sheets>"
+        + (f"<definedNames>{noms_definis}</definedNames>" if noms_definis else "")
+        + "</workbook>"
+    )
+
+
+def _xml_types_contenu(nombre_feuilles: int) -> str:
+    """XML de [Content_Types].xml."""
+    feuilles = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{index}.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for index in range(1, nombre_feuilles + 1)
+    )
+    return (
+        _ENTETE_XML
+        + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        f"{feuilles}</Types>"
+    )
+
+
+def _xml_relations_classeur(nombre_feuilles: int) -> str:
+    """XML de xl/_rels/workbook.xml.rels (feuilles puis styles)."""
+    relations = "".join(
+        f'<Relationship Id="rId{index}" Type="{_NS_REL}/worksheet" Target="worksheets/sheet{index}.xml"/>'
+        for index in range(1, nombre_feuilles + 1)
+    )
+    return (
+        _ENTETE_XML
+        + f'<Relationships xmlns="{_NS_PKG_REL}">{relations}'
+        f'<Relationship Id="rId{nombre_feuilles + 1}" Type="{_NS_REL}/styles" Target="styles.xml"/>'
+        "</Relationships>"
+    )
+
+
+def ecrire_classeur_xml(fichier_excel: Path, feuilles: Sequence[Tuple[str, pd.DataFrame]]) -> None:
+    """
+    Écrit un classeur .xlsx en générant directement le XML de chaque feuille.
+
+    Parameters
+    ----------
+    fichier_excel : Path
+        Chemin de sortie du fichier Excel.
+    feuilles : Sequence[Tuple[str, pd.DataFrame]]
+        Feuilles à écrire, dans l'ordre : (nom de la feuille, données).
+        Un classeur sans feuille reçoit une feuille vide « Sheet1 ».
+    """
+    feuilles = list(feuilles) or [("Sheet1", pd.DataFrame())]
+
+    # Compression rapide (niveau 1) : le temps d'écriture est dominé par le zlib
+    with zipfile.ZipFile(
+        fichier_excel, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1
+    ) as archive:
+        archive.writestr("[Content_Types].xml", _xml_types_contenu(len(feuilles)))
+        archive.writestr(
+            "_rels/.rels",
+            _ENTETE_XML
+            + f'<Relationships xmlns="{_NS_PKG_REL}">'
+            f'<Relationship Id="rId1" Type="{_NS_REL}/officeDocument" Target="xl/workbook.xml"/>'
+            "</Relationships>",
+        )
+        archive.writestr("xl/workbook.xml", _xml_classeur(feuilles))
+        archive.writestr("xl/_rels/workbook.xml.rels", _xml_relations_classeur(len(feuilles)))
+        archive.writestr("xl/styles.xml", _STYLES_XML)
+
+        for index, (nom_feuille, dataframe) in enumerate(feuilles, start=1):
+            with archive.open(f"xl/worksheets/sheet{index}.xml", "w", force_zip64=True) as flux:
+                if len(dataframe.columns):
+                    for morceau in _xml_feuille(dataframe):
+                        flux.write(morceau.encode("utf-8"))
+                else:
+                    flux.write(
+                        (_ENTETE_XML + f'<worksheet xmlns="{_NS_MAIN}"><sheetData/></worksheet>').encode("utf-8")
+                    )
+            if len(dataframe.columns):
+                print(f"✅ Données {nom_feuille} ajoutées à l'Excel.")
@@ -0,0 +1,347 @@
+"""
+Client HTTP partagé pour les appels à l'API Aruba Central.
+
+Ce module centralise les appels GET vers Central :
+- Une session requests partagée (connexions HTTP keep-alive réutilisées entre les appels)
+  et des délais de connexion / lecture par défaut
+- Limitation du débit (seau à jetons) pour rester sous le plafond de requêtes par seconde,
+  et du nombre de requêtes en cours simultanément
+- Nouvelles tentatives avec attente exponentielle : sur les erreurs réseau par urllib3
+  (Retry monté sur la session), sur les réponses 429 / 5xx par get() en respectant
+  l'en-tête Retry-After
+- Ajustement automatique du débit d'après les en-têtes X-RateLimit renvoyés par Central
+- Pagination des listes Central (offset / limit), pages restantes récupérées en parallèle
+  quand le total est annoncé par la première page
+- Décodage JSON rapide avec orjson s'il est installé (sinon json de la bibliothèque standard)
+
+La dernière réponse est toujours retournée telle quelle : chaque module garde
+sa propre gestion des codes de statut.
+"""
+
+import inspect
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    orjson = None
+
+
+# Plafond documenté par Aruba Central : 7 requêtes par seconde
+MAX_REQUETES_PAR_SECONDE = 7
+
+# Requêtes en cours simultanément, tous modules et threads confondus
+MAX_REQUETES_EN_COURS = 10
+
+# Nouvelles tentatives : 0.5s, 1s, 2s, ... plafonné à 30s, 6 essais au total
+MAX_TENTATIVES = 6
+DELAI_BASE = 0.5
+DELAI_MAX = 30.0
+CODES_A_REESSAYER = frozenset({429, 500, 502, 503, 504})
+
+# Connexions keep-alive conservées par hôte : une par requête pouvant être en cours,
+# toutes les requêtes vers Central réutilisent donc ce petit nombre de connexions
+TAILLE_POOL_CONNEXIONS = MAX_REQUETES_EN_COURS
+
+# Nombre maximal de pages d'une même liste récupérées en parallèle
+MAX_PAGES_EN_PARALLELE = 8
+
+# Paramètres ajoutés à la première page d'une liste : sans calculate_total, Central
+# ne renvoie pas le champ `total` et la pagination reste séquentielle
+PARAMS_PREMIERE_PAGE = {"calculate_total": "true"}
+
+# Délais par défaut (connexion, lecture) en secondes : une connexion bloquée
+# ne doit pas immobiliser indéfiniment un thread de la collecte
+TIMEOUT_PAR_DEFAUT: Tuple[float, float] = (3.05, 30.0)
+
+
+class _RetryReseau(Retry):
+    """
+    Retry dont l'attente est plafonnée à DELAI_MAX sur toutes les versions d'urllib3 :
+    urllib3 < 2 n'accepte pas le paramètre ``backoff_max`` et lit ce plafond
+    dans l'attribut de classe ``DEFAULT_BACKOFF_MAX`` (conservé par ``Retry.new``).
+    """
+
+    DEFAULT_BACKOFF_MAX = DELAI_MAX
+
+
+# urllib3 >= 2 : le plafond passe par le paramètre backoff_max
+_BACKOFF_MAX_EN_PARAMETRE = "backoff_max" in inspect.signature(Retry.__init__).parameters
+
+
+def _creer_retry_reseau() -> Retry:
+    """
+    Nouvelles tentatives urllib3 pour les erreurs réseau (connexion refusée ou coupée,
+    délai de lecture dépassé) : une connexion keep-alive fermée par le serveur est rouverte
+    immédiatement, puis avec une attente exponentielle.
+
+    Les réponses 429 / 5xx ne sont pas réessayées ici : get() s'en charge, afin de
+    suspendre le limiteur de débit partagé par tous les threads.
+    """
+    plafond = {"backoff_max": DELAI_MAX} if _BACKOFF_MAX_EN_PARAMETRE else {}
+    return _RetryReseau(
+        total=MAX_TENTATIVES - 1,
+        connect=MAX_TENTATIVES - 1,
+        read=MAX_TENTATIVES - 1,
+        status=0,
+        backoff_factor=DELAI_BASE,
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False,
+        respect_retry_after_header=False,
+        **plafond,
+    )
+
+
+def _creer_session() -> requests.Session:
+    """
+    Crée la session partagée, avec un pool de connexions dimensionné pour les threads.
+    """
+    # La compression des réponses est déjà demandée par requests (en-tête Accept-Encoding
+    # par défaut : gzip, deflate, plus br / zstd si brotli ou zstandard sont installés)
+    session = requests.Session()
+    adaptateur = HTTPAdapter(
+        pool_connections=TAILLE_POOL_CONNEXIONS,
+        pool_maxsize=TAILLE_POOL_CONNEXIONS,
+        max_retries=_creer_retry_reseau(),
+    )
+    session.mount("https://", adaptateur)
+    session.mount("http://", adaptateur)
+    return session
+
+
+# Session unique : évite une nouvelle poignée de main TCP + TLS à chaque requête
+SESSION = _creer_session()
+
+
+class _SeauAJetons:
+    """
+    Limiteur de débit partagé entre les threads.
+
+    Le seau se remplit de `debit` jetons par seconde jusqu'à `capacite` ;
+    chaque requête consomme un jeton et attend s'il n'y en a plus.
+    """
+
+    def __init__(self, debit: float, capacite: Optional[float] = None) -> None:
+        self.debit = float(debit)
+        self.capacite = float(capacite if capacite is not None else debit)
+        self._jetons = self.capacite
+        self._dernier = time.monotonic()
+        self._verrou = threading.Lock()
+
+    def _remplir(self) -> None:
+        maintenant = time.monotonic()
+        self._jetons = min(self.capacite, self._jetons + (maintenant - self._dernier) * self.debit)
+        self._dernier = maintenant
+
+    def acquerir(self) -> None:
+        """Attend qu'un jeton soit disponible puis le consomme."""
+        while True:
+            with self._verrou:
+                self._remplir()
+                if self._jetons >= 1:
+                    self._jetons -= 1
+                    return
+                attente = (1 - self._jetons) / self.debit
+            time.sleep(attente)
+
+    def suspendre(self, duree: float) -> None:
+        """Vide le seau pour qu'aucune requête ne parte avant `duree` secondes."""
+        with self._verrou:
+            self._remplir()
+            self._jetons = min(self._jetons, 1 - duree * self.debit)
+
+
+LIMITEUR = _SeauAJetons(MAX_REQUETES_PAR_SECONDE)
+
+# Borne le nombre de requêtes en vol, quel que soit le nombre de threads des collecteurs
+_REQUETES_EN_COURS = threading.BoundedSemaphore(MAX_REQUETES_EN_COURS)
+
+
+def _ajuster_debit(response: requests.Response) -> None:
+    """Suspend les envois si Central indique que le quota de la seconde est épuisé."""
+    restant = response.headers.get("X-RateLimit-Remaining-second")
+    if restant is not None and restant.strip() == "0":
+        LIMITEUR.suspendre(1.0)
+
+
+def _delai_avant_nouvel_essai(response: requests.Response, tentative: int) -> float:
+    """
+    Calcule l'attente avant le prochain essai : Retry-After s'il est fourni
+    (en secondes ou en date HTTP), sinon une attente exponentielle.
+    """
+    delai = min(DELAI_MAX, DELAI_BASE * (2 ** tentative))
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            delai = float(retry_after)
+        except ValueError:
+            try:
+                delai = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            except (TypeError, ValueError):
+                pass
+    return min(DELAI_MAX, max(0.0, delai))
+
+
+def get(
+    url: str,
+    headers: Optional[Mapping[str, str]] = None,
+    params: Optional[Dict[str, Any]] = None,
+    timeout: Union[float, Tuple[float, float], None] = TIMEOUT_PAR_DEFAUT,
+) -> requests.Response:
+    """
+    Envoie une requête GET limitée en débit, avec nouvelles tentatives.
+
+    Parameters
+    ----------
+    url : str
+        URL complète de l'endpoint.
+    headers : Optional[Mapping[str, str]]
+        En-têtes HTTP (authorization, accept...).
+    params : Optional[Dict[str, Any]]
+        Paramètres de la requête (query string).
+    timeout : Union[float, Tuple[float, float], None]
+        Délai maximal d'attente en secondes, global ou (connexion, lecture).
+        Par défaut TIMEOUT_PAR_DEFAUT ; None attend sans limite.
+
+    Returns
+    -------
+    requests.Response
+        Dernière réponse reçue (éventuellement en erreur après épuisement des essais).
+
+    Raises
+    ------
+    requests.ConnectionError, requests.Timeout
+        Si le serveur reste injoignable après les nouvelles tentatives réseau d'urllib3.
+    """
+    for tentative in range(MAX_TENTATIVES):
+        with _REQUETES_EN_COURS:
+            LIMITEUR.acquerir()
+            response = SESSION.get(url, headers=headers, params=params, timeout=timeout)
+
+        _ajuster_debit(response)
+        if response.status_code not in CODES_A_REESSAYER or tentative == MAX_TENTATIVES - 1:
+            return response
+
+        attente = _delai_avant_nouvel_essai(response, tentative)
+        if response.status_code == 429:
+            LIMITEUR.suspendre(attente)
+        print(
+            f"⏳ Erreur {response.status_code} sur {url}, "
+            f"nouvel essai dans {attente:.1f}s ({tentative + 1}/{MAX_TENTATIVES - 1})"
+        )
+        time.sleep(attente)
+
+    return response
+
+
+def lire_json(response: requests.Response) -> Any:
+    """
+    Décode le corps JSON d'une réponse.
+
+    Utilise orjson directement sur les octets reçus s'il est installé, sinon response.json().
+    Lève une ValueError (json.JSONDecodeError) si le corps n'est pas du JSON valide.
+    """
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+def _recuperer_page(
+    endpoint: str,
+    headers: Optional[Mapping[str, str]],
+    params: Dict[str, Any],
+    cles_liste: Sequence[str],
+) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """
+    Récupère une page d'une liste et retourne les éléments (première clé non vide
+    parmi `cles_liste`), ainsi que le total annoncé par l'API (None s'il est absent).
+    """
+    response = get(endpoint, headers=headers, params=params)
+    if response.status_code != 200:
+        raise ValueError(f"❌ Erreur {response.status_code}: {response.text}")
+
+    payload = lire_json(response) if response.content else {}
+    elements = next((payload[cle] for cle in cles_liste if payload.get(cle)), [])
+    total = payload.get("total")
+    return elements, total if isinstance(total, int) else None
+
+
+def recuperer_pages(
+    endpoint: str,
+    headers: Optional[Mapping[str, str]],
+    params: Dict[str, Any],
+    cles_liste: Sequence[str],
+    limit: int = 100,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Récupère toutes les pages d'une liste paginée par offset / limit.
+
+    La première page est demandée avec calculate_total (PARAMS_PREMIERE_PAGE), indispensable
+    pour que Central renvoie le total : si l'API l'annonce,
+    les pages restantes sont planifiées d'après lui et récupérées en parallèle, dans l'ordre,
+    avec pour pas la taille réelle de la première page (l'API peut plafonner `limit`).
+    Sinon, les pages sont demandées l'une après l'autre jusqu'à une page incomplète.
+
+    Parameters
+    ----------
+    endpoint : str
+        URL complète de la liste (ex: .../monitoring/v1/gateways).
+    headers : Optional[Mapping[str, str]]
+        En-têtes HTTP (authorization, accept...).
+    params : Dict[str, Any]
+        Paramètres communs à toutes les pages (filtres) ; offset et limit sont ajoutés.
+    cles_liste : Sequence[str]
+        Clés possibles de la liste dans la réponse, par ordre de préférence (ex: ("gateways", "data")).
+    limit : int
+        Nombre d'entrées par page.
+
+    Returns
+    -------
+    List[List[Dict[str, Any]]]
+        Pages dans l'ordre, telles que renvoyées par l'API (éventuellement vides).
+
+    Raises
+    ------
+    ValueError
+        Si une page répond avec un code différent de 200.
+    """
+    params_base = {**params, "limit": limit}
+
+    def recuperer(offset: int) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        params_page = {**params_base, "offset": offset}
+        if offset == 0:
+            # Seule la première page sert à lire le total : inutile de le faire calculer ensuite
+            params_page.update(PARAMS_PREMIERE_PAGE)
+        return _recuperer_page(endpoint, headers, params_page, cles_liste)
+
+    premiere_page, total = recuperer(0)
+    pages = [premiere_page]
+
+    if total is not None:
+        taille_page = len(premiere_page)
+        offsets = range(taille_page, total, taille_page) if taille_page else range(0)
+        if offsets:
+            with ThreadPoolExecutor(max_workers=min(MAX_PAGES_EN_PARALLELE, len(offsets))) as executor:
+                pages.extend(page for page, _ in executor.map(recuperer, offsets))
+    elif len(premiere_page) >= limit:
+        # Total absent de la réponse : pagination séquentielle jusqu'à une page incomplète
+        offset = limit
+        while True:
+            page, _ = recuperer(offset)
+            if not page:
+                break
+
+            pages.append(page)
+            if len(page) < limit:
+                break
+            offset += limit
+
+    return pages
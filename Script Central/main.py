@@ -5,13 +5,15 @@ Ce script se connecte à l'API Aruba Central, récupère les informations d'inve
 et de firmware des équipements, puis les exporte dans un fichier Excel formaté.
 """
 
+import argparse
 import os
-from typing import List
+from typing import Dict, List, Optional
 
 from pycentral.base import ArubaCentralBase
 
 from central_config import charger_central_info, lister_clients
 from data_pipeline import collect_datasets
+from dataset_cache import DUREE_CACHE_MINUTES, charger_jeux_de_donnees, sauvegarder_jeux_de_donnees
 from excel_export import export_to_excel
 from email_sender import charger_config_email, envoyer_email_avec_piece_jointe
 
@@ -32,31 +34,70 @@ def demander_client() -> str:
     for index, nom_client in enumerate(clients_disponibles, start=1):
         print(f"  {index}. {nom_client}")
 
+    # Recherche par nom en temps constant : nom exact, ou à défaut sans tenir compte de la casse
+    nombre_clients = len(clients_disponibles)
+    clients_connus = set(clients_disponibles)
+    clients_par_nom_minuscule: Dict[str, str] = {}
+    for nom_client in clients_disponibles:
+        clients_par_nom_minuscule.setdefault(nom_client.lower(), nom_client)
+
     while True:
         choix = input("Entrez le numéro ou le nom du client : ").strip()
 
         if choix.isdigit():
             position = int(choix)
-            if 1 <= position <= len(clients_disponibles):
+            if 1 <= position <= nombre_clients:
                 return clients_disponibles[position - 1]
             print("Numéro invalide. Merci de réessayer.")
             continue
 
-        if choix in clients_disponibles:
+        if choix in clients_connus:
             return choix
+        nom_client = clients_par_nom_minuscule.get(choix.lower())
+        if nom_client:
+            return nom_client
 
         print("Sélection invalide. Merci de réessayer.")
 
 
-def main() -> None:
+def analyser_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Analyse les options de la ligne de commande.
+    """
+    parser = argparse.ArgumentParser(
+        description="Génère le rapport d'inventaire et de firmware Aruba Central d'un client."
+    )
+    parser.add_argument(
+        "--use-cache",
+        action="store_true",
+        help="Réutilise les données collectées récemment (Report/.cache) au lieu d'appeler l'API.",
+    )
+    parser.add_argument(
+        "--cache-minutes",
+        type=float,
+        default=DUREE_CACHE_MINUTES,
+        help=f"Âge maximal du cache en minutes (défaut : {DUREE_CACHE_MINUTES}).",
+    )
+    parser.add_argument(
+        "--fast-excel",
+        action="store_true",
+        help="Écrit le XML du fichier Excel directement (gros inventaires) : en-têtes en gras "
+        "et filtres uniquement, sans bordures ni largeur de colonnes.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
     """
     Fonction principale qui orchestre la récupération des données et l'export Excel.
     
     Étapes :
     1. Configuration de la connexion à Aruba Central
-    2. Récupération des données d'inventaire et de firmware
+    2. Récupération des données d'inventaire et de firmware (ou relecture du cache)
     3. Export des données dans un fichier Excel avec formatage
     """
+    arguments = analyser_arguments(argv)
+
     # Configuration de la vérification SSL (True = vérification activée)
     ssl_verify: bool = True
     
@@ -64,6 +105,7 @@ def main() -> None:
     script_dir = os.path.dirname(os.path.abspath(__file__))
     token_store_dir = os.path.join(script_dir, "temp")
     report_dir = os.path.join(script_dir, "Report")
+    cache_dir = os.path.join(report_dir, ".cache")
     
     # Sélection du client et chargement de sa configuration
     nom_client_selectionne = demander_client()
@@ -95,17 +137,28 @@ def main() -> None:
     # Cela permet à script_load_token.load_token() de trouver automatiquement le bon token
     os.environ["CENTRAL_TOKEN_DIR"] = token_dir_client
 
-    # Initialisation de la connexion à Aruba Central
-    # central_info contient les informations de connexion (client_id, client_secret, etc.)
-    central = ArubaCentralBase(
-        central_info=central_info,
-        token_store={"path": token_dir_client},  # Dossier de tokens spécifique au client
-        ssl_verify=ssl_verify,
-    )
+    # Relecture des données d'une exécution récente si demandé
+    jeux_de_donnees = None
+    if arguments.use_cache:
+        jeux_de_donnees = charger_jeux_de_donnees(
+            cache_dir, nom_client_selectionne, arguments.cache_minutes
+        )
+        if jeux_de_donnees is None:
+            print("ℹ️  Aucun cache récent pour ce client, collecte depuis l'API.")
 
     try:
-        jeux_de_donnees = collect_datasets(central=central, base_url=base_url)
-        export_to_excel(fichier_excel, jeux_de_donnees)
+        if jeux_de_donnees is None:
+            # Initialisation de la connexion à Aruba Central
+            # central_info contient les informations de connexion (client_id, client_secret, etc.)
+            central = ArubaCentralBase(
+                central_info=central_info,
+                token_store={"path": token_dir_client},  # Dossier de tokens spécifique au client
+                ssl_verify=ssl_verify,
+            )
+            jeux_de_donnees = collect_datasets(central=central, base_url=base_url)
+            sauvegarder_jeux_de_donnees(cache_dir, nom_client_selectionne, jeux_de_donnees)
+
+        export_to_excel(fichier_excel, jeux_de_donnees, rapide=arguments.fast_excel)
         print(f"✅ Rapport Excel généré : {fichier_excel}")
         """   
         # Envoi par email si configuré
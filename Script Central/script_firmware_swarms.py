@@ -8,11 +8,14 @@ et expose trois DataFrames :
     - un tableau synthétique (VC, version actuelle, version recommandée)
 """
 
+from concurrent.futures import Future, ThreadPoolExecutor
+from operator import itemgetter
 from typing import Optional, Dict, Any, List, Tuple
 
+import numpy as np
 import pandas as pd
-import requests
 
+import http_client
 from script_load_token import load_token, get_access_token
 
 
@@ -47,13 +50,13 @@ def _recuperer_aps_monitoring(base_url: str) -> pd.DataFrame:
     
     while True:
         params = {"limit": limit, "offset": offset}
-        response = requests.get(endpoint, headers=headers, params=params)
+        response = http_client.get(endpoint, headers=headers, params=params)
         
         if response.status_code != 200:
             print(f"⚠️ Erreur {response.status_code} lors de la récupération des APs: {response.text[:200]}")
             break
         
-        payload = response.json() if response.text else {}
+        payload = http_client.lire_json(response) if response.content else {}
         aps = payload.get("aps") or payload.get("data") or []
         
         if not aps:
@@ -80,61 +83,117 @@ def _recuperer_aps_monitoring(base_url: str) -> pd.DataFrame:
     return pd.DataFrame(aps_data)
 
 
-def _vc_row_from_swarm(swarm: Dict[str, Any]) -> Dict[str, Any]:
+# Colonnes des DataFrames construits à partir de firmware/v1/swarms
+COLONNES_VC = [
+    "serial",
+    "mac_address",
+    "hostname",
+    "model",
+    "vc_name",
+    "vc_id",
+    "members_count",
+    "firmware_version",
+    "recommended",
+    "device_status",
+    "upgrade_required",
+    "status_state",
+    "status_reason",
+    "firmware_scheduled_at",
+]
+
+COLONNES_AP = [
+    "serial",
+    "mac_address",
+    "hostname",
+    "model",
+    "vc_name",
+    "vc_id",
+    "firmware_version",
+    "recommended",
+    "device_status",
+    "upgrade_required",
+    "status_state",
+    "status_reason",
+    "firmware_scheduled_at",
+]
+
+# Colonnes propres à chaque AP (en tête de COLONNES_AP) et clé correspondante dans l'objet AP ;
+# les colonnes suivantes sont celles du swarm, communes avec COLONNES_VC
+_CHAMPS_AP = {
+    "serial": "serial",
+    "mac_address": "mac_address",
+    "hostname": "name",
+    "model": "model",
+}
+
+COLONNES_VERSIONS = ["vc_name", "firmware_version", "recommended_firmware_version"]
+
+# Extrait (vc_name, firmware_version, recommended) d'une ligne VC pour la vue synthétique
+_CHAMPS_VERSIONS_VC = itemgetter(
+    *(COLONNES_VC.index(colonne) for colonne in ("vc_name", "firmware_version", "recommended"))
+)
+
+
+def _vc_row_from_swarm(swarm: Dict[str, Any]) -> Tuple[Any, ...]:
     """
     Transforme un objet swarm en une ligne représentant le Virtual Controller.
+
+    La ligne est un tuple dans l'ordre de COLONNES_VC.
     """
     aps = swarm.get("aps") or []
     status = swarm.get("status") or {}
     ap_reference = aps[0] if aps else {}
+    swarm_name = swarm.get("swarm_name")
+    swarm_id = swarm.get("swarm_id")
 
-    return {
-        "serial": swarm.get("swarm_id"),
-        "mac_address": ap_reference.get("mac_address"),
-        "hostname": swarm.get("swarm_name"),
-        "model": ap_reference.get("model"),
-        "vc_name": swarm.get("swarm_name"),
-        "vc_id": swarm.get("swarm_id"),
-        "members_count": len(aps),
-        "firmware_version": swarm.get("firmware_version"),
-        "recommended": swarm.get("recommended"),
-        "device_status": swarm.get("device_status"),
-        "upgrade_required": swarm.get("upgrade_required"),
-        "status_state": status.get("state"),
-        "status_reason": status.get("reason"),
-        "firmware_scheduled_at": status.get("firmware_scheduled_at"),
-    }
+    return (
+        swarm_id,
+        ap_reference.get("mac_address"),
+        swarm_name,
+        ap_reference.get("model"),
+        swarm_name,
+        swarm_id,
+        len(aps),
+        swarm.get("firmware_version"),
+        swarm.get("recommended"),
+        swarm.get("device_status"),
+        swarm.get("upgrade_required"),
+        status.get("state"),
+        status.get("reason"),
+        status.get("firmware_scheduled_at"),
+    )
 
 
-def _ap_rows_from_swarm(swarm: Dict[str, Any]) -> List[Dict[str, Any]]:
+def _dataframe_aps(swarms: List[Dict[str, Any]], lignes_vc: List[Tuple[Any, ...]]) -> pd.DataFrame:
     """
-    Transforme un objet swarm en plusieurs lignes représentant chaque AP du swarm.
+    Construit le DataFrame des APs (une ligne par AP de chaque swarm), colonne par colonne.
+
+    Les champs propres à l'AP sont lus une fois par AP ; les champs du swarm sont repris
+    des lignes VC déjà construites et répétés autant de fois que le swarm compte d'APs.
     """
-    aps = swarm.get("aps") or []
-    status = swarm.get("status") or {}
-    rows: List[Dict[str, Any]] = []
-    for ap in aps:
-        rows.append(
-            {
-                "serial": ap.get("serial"),
-                "mac_address": ap.get("mac_address"),
-                "hostname": ap.get("name"),
-                "model": ap.get("model"),
-                "vc_name": swarm.get("swarm_name"),
-                "vc_id": swarm.get("swarm_id"),
-                "firmware_version": swarm.get("firmware_version"),
-                "recommended": swarm.get("recommended"),
-                "device_status": swarm.get("device_status"),
-                "upgrade_required": swarm.get("upgrade_required"),
-                "status_state": status.get("state"),
-                "status_reason": status.get("reason"),
-                "firmware_scheduled_at": status.get("firmware_scheduled_at"),
-            }
-        )
-    return rows
+    aps_par_swarm = [swarm.get("aps") or [] for swarm in swarms]
+    nombre_aps = [len(aps) for aps in aps_par_swarm]
+    tous_aps = [ap for aps in aps_par_swarm for ap in aps]
+    if not tous_aps:
+        return pd.DataFrame(columns=COLONNES_AP)
+
+    colonnes: Dict[str, List[Any]] = {
+        colonne: [ap.get(cle) for ap in tous_aps]
+        for colonne, cle in _CHAMPS_AP.items()
+    }
+    for colonne in COLONNES_AP[len(_CHAMPS_AP):]:
+        position = COLONNES_VC.index(colonne)
+        valeurs_swarm = np.array([ligne[position] for ligne in lignes_vc], dtype=object)
+        colonnes[colonne] = np.repeat(valeurs_swarm, nombre_aps).tolist()
+
+    return pd.DataFrame(colonnes, columns=COLONNES_AP)
 
 
-def _enrichir_aps_avec_site(df_aps: pd.DataFrame, base_url: str) -> pd.DataFrame:
+def _enrichir_aps_avec_site(
+    df_aps: pd.DataFrame,
+    base_url: str,
+    aps_monitoring: Optional["Future[pd.DataFrame]"] = None,
+) -> pd.DataFrame:
     """
     Enrichit le DataFrame des APs avec les champs 'site' et 'ip_address' depuis l'API monitoring/v2/aps.
     
@@ -144,6 +203,9 @@ def _enrichir_aps_avec_site(df_aps: pd.DataFrame, base_url: str) -> pd.DataFrame
         DataFrame contenant les APs des swarms
     base_url : str
         URL de base Aruba Central
+    aps_monitoring : Optional[Future[pd.DataFrame]]
+        Résultat de _recuperer_aps_monitoring déjà lancé en arrière-plan ;
+        si None, l'appel est fait ici
         
     Returns
     -------
@@ -166,7 +228,10 @@ def _enrichir_aps_avec_site(df_aps: pd.DataFrame, base_url: str) -> pd.DataFrame
     
     # Récupérer les APs depuis l'API monitoring
     try:
-        df_aps_monitoring = _recuperer_aps_monitoring(base_url)
+        if aps_monitoring is not None:
+            df_aps_monitoring = aps_monitoring.result()
+        else:
+            df_aps_monitoring = _recuperer_aps_monitoring(base_url)
         
         if df_aps_monitoring.empty:
             print("⚠️ Aucun AP trouvé dans l'API monitoring, site et IP seront vides")
@@ -235,6 +300,41 @@ def _enrichir_aps_avec_site(df_aps: pd.DataFrame, base_url: str) -> pd.DataFrame
     return df_aps
 
 
+def _construire_dataframes_swarms(
+    swarms: List[Dict[str, Any]],
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Construit les DataFrames (VC, APs, versions) à partir de la réponse firmware/v1/swarms.
+
+    Traitement purement local (sans appel API), exécuté pendant que la liste
+    des APs monitoring est récupérée en arrière-plan.
+    """
+    if not swarms:
+        empty_details = pd.DataFrame(columns=COLONNES_VC)
+        empty_aps = pd.DataFrame(columns=[*COLONNES_AP, "site", "ip_address"])
+        empty_versions = pd.DataFrame(columns=COLONNES_VERSIONS)
+        return empty_details, empty_aps, empty_versions
+
+    # Lignes construites en tuples (ordre fixe des colonnes) puis chargées en un seul appel
+    lignes_vc = [_vc_row_from_swarm(swarm) for swarm in swarms]
+    df_details = pd.DataFrame.from_records(lignes_vc, columns=COLONNES_VC)
+    df_aps = _dataframe_aps(swarms, lignes_vc)
+
+    # La vue synthétique reprend les champs déjà extraits pour chaque VC,
+    # dédoublonnés (dans l'ordre d'apparition) avant la création du DataFrame
+    lignes_versions = list(dict.fromkeys(map(_CHAMPS_VERSIONS_VC, lignes_vc)))
+    df_versions = pd.DataFrame.from_records(lignes_versions, columns=COLONNES_VERSIONS)
+
+    # Harmoniser visuellement les booléens pour Excel (valeurs absentes considérées comme False)
+    def oui_non(df: pd.DataFrame) -> pd.DataFrame:
+        if df.empty or "upgrade_required" not in df.columns:
+            return df
+        masque = df["upgrade_required"].fillna(False).to_numpy(dtype=bool)
+        return df.assign(upgrade_required=np.where(masque, "Yes", "No"))
+
+    return oui_non(df_details), oui_non(df_aps), df_versions
+
+
 def get_firmware_swarms(
     limit: Optional[int] = None,
     base_url: Optional[str] = None,
@@ -244,6 +344,9 @@ def get_firmware_swarms(
         - un DataFrame détaillé (une ligne par VC)
         - un DataFrame synthétique (VC, version actuelle, version recommandée)
 
+    Si les swarms contiennent des APs, la liste des APs monitoring (site et adresse IP)
+    est récupérée en parallèle de la construction des DataFrames.
+
     Parameters
     ----------
     limit : Optional[int]
@@ -260,7 +363,6 @@ def get_firmware_swarms(
     if not base_url:
         raise ValueError("La base URL Aruba Central doit être fournie pour les swarms.")
     endpoint = base_url.rstrip("/") + "/firmware/v1/swarms"
-    print(f"🔗 Appel API swarms : {endpoint}")
     headers = {
         "accept": "application/json",
         "authorization": f"Bearer {access_token}",
@@ -269,89 +371,24 @@ def get_firmware_swarms(
     if limit is not None:
         params["limit"] = limit
 
-    response = requests.get(endpoint, headers=headers, params=params)
+    print(f"🔗 Appel API swarms : {endpoint}")
+    response = http_client.get(endpoint, headers=headers, params=params)
     if response.status_code != 200:
         raise ValueError(f"❌ Erreur {response.status_code}: {response.text}")
 
-    data = response.json()
+    data = http_client.lire_json(response)
     swarms = data.get("swarms", [])
 
-    details_rows: List[Dict[str, Any]] = []
-    aps_rows: List[Dict[str, Any]] = []
-    versions_rows: List[Dict[str, Any]] = []
-    for swarm in swarms:
-        details_rows.append(_vc_row_from_swarm(swarm))
-        aps_rows.extend(_ap_rows_from_swarm(swarm))
-        versions_rows.append(
-            {
-                "vc_name": swarm.get("swarm_name"),
-                "firmware_version": swarm.get("firmware_version"),
-                "recommended_firmware_version": swarm.get("recommended"),
-            }
-        )
+    # Sans AP à enrichir, la pagination monitoring/v2/aps n'est pas lancée
+    if not any(swarm.get("aps") for swarm in swarms):
+        return _construire_dataframes_swarms(swarms)
 
-    if not details_rows and not aps_rows:
-        empty_details = pd.DataFrame(
-            columns=[
-                "serial",
-                "mac_address",
-                "hostname",
-                "model",
-                "vc_name",
-                "vc_id",
-                "members_count",
-                "firmware_version",
-                "recommended",
-                "device_status",
-                "upgrade_required",
-                "status_state",
-                "status_reason",
-                "firmware_scheduled_at",
-            ]
-        )
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        aps_monitoring = executor.submit(_recuperer_aps_monitoring, base_url)
+        df_details, df_aps, df_versions = _construire_dataframes_swarms(swarms)
 
-        empty_aps = pd.DataFrame(
-            columns=[
-                "serial",
-                "mac_address",
-                "hostname",
-                "model",
-                "vc_name",
-                "vc_id",
-                "firmware_version",
-                "recommended",
-                "device_status",
-                "upgrade_required",
-                "status_state",
-                "status_reason",
-                "firmware_scheduled_at",
-                "site",
-                "ip_address",
-            ]
-        )
-
-        empty_versions = pd.DataFrame(
-            columns=["vc_name", "firmware_version", "recommended_firmware_version"]
-        )
-        return empty_details, empty_aps, empty_versions
-
-    df_details = pd.DataFrame(details_rows) if details_rows else pd.DataFrame()
-    df_aps = pd.DataFrame(aps_rows) if aps_rows else pd.DataFrame()
-    df_versions = pd.DataFrame(versions_rows).drop_duplicates()
-
-    # Enrichir les APs avec les champs site et ip_address depuis l'API monitoring/v2/aps
-    if not df_aps.empty and base_url:
-        df_aps = _enrichir_aps_avec_site(df_aps, base_url)
-    elif not df_aps.empty:
-        df_aps["site"] = None
-        df_aps["ip_address"] = None
-
-    # Harmoniser visuellement les booléens pour Excel
-    for df in (df_details, df_aps):
-        if not df.empty and "upgrade_required" in df.columns:
-            df["upgrade_required"] = df["upgrade_required"].apply(
-                lambda x: "Yes" if bool(x) else "No"
-            )
+        # Enrichir les APs avec les champs site et ip_address depuis l'API monitoring/v2/aps
+        if not df_aps.empty:
+            df_aps = _enrichir_aps_avec_site(df_aps, base_url, aps_monitoring)
 
     return df_details, df_aps, df_versions
-
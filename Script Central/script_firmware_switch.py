@@ -8,7 +8,8 @@ modules qui utilisent le SDK pycentral.
 
 from typing import Optional
 from script_load_token import load_token, get_access_token
-import requests
+import http_client
+import numpy as np
 import pandas as pd
 
 
@@ -76,14 +77,14 @@ def get_firmware_switch(
     }
 
     # Appel GET à l'API pour récupérer les données de firmware
-    response = requests.get(endpoint, headers=headers, params=params)
+    response = http_client.get(endpoint, headers=headers, params=params)
     
     # Vérification du code de statut HTTP
     if response.status_code != 200:
         raise ValueError(f"❌ Erreur {response.status_code}: {response.text}")
 
     # Conversion de la réponse JSON en dictionnaire Python
-    data = response.json()
+    data = http_client.lire_json(response)
     # Extraction de la liste des équipements depuis la réponse
     devices = data.get("devices", [])
 
@@ -113,7 +114,11 @@ def get_firmware_switch(
     df = df[columns_order]
 
     # Conversion des valeurs booléennes en texte "Yes"/"No" pour une meilleure lisibilité dans Excel
-    for col in ["is_reboot_enable", "upgrade_required", "is_stack"]:
-        df[col] = df[col].apply(lambda x: "Yes" if x else "No")
+    # (vectorisé ; les valeurs absentes sont considérées comme False)
+    colonnes_booleennes = ["is_reboot_enable", "upgrade_required", "is_stack"]
+    df = df.assign(**{
+        col: np.where(df[col].fillna(False).to_numpy(dtype=bool), "Yes", "No")
+        for col in colonnes_booleennes
+    })
 
     return df
@@ -3,13 +3,18 @@ Utilitaires pour récupérer et filtrer les versions de firmware depuis Aruba Ce
 """
 
 import re
-from typing import List, Optional, Tuple
-
-import requests
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
 
+import http_client
 from script_load_token import load_token, get_access_token
 
 
+# Segments numériques d'une version (compilé une seule fois)
+_VERSION_RE = re.compile(r"\d+")
+
+
+@lru_cache(maxsize=4096)
 def _version_to_tuple(version: str, length: int = 4) -> Optional[Tuple[int, ...]]:
     """
     Convertit une version au format chaîne en tuple d'entiers comparable.
@@ -18,7 +23,7 @@ def _version_to_tuple(version: str, length: int = 4) -> Optional[Tuple[int, ...]
     if not version:
         return None
 
-    numbers = re.findall(r"\d+", version)
+    numbers = _VERSION_RE.findall(version)
     if not numbers:
         return None
 
@@ -46,12 +51,12 @@ def get_firmware_versions(device_type: str = "IAP", base_url: Optional[str] = No
         "authorization": f"Bearer {access_token}",
     }
 
-    response = requests.get(endpoint, headers=headers, params=params)
+    response = http_client.get(endpoint, headers=headers, params=params)
     if response.status_code != 200:
         raise ValueError(f"❌ Erreur {response.status_code}: {response.text}")
 
     try:
-        payload = response.json()
+        payload = http_client.lire_json(response)
     except ValueError as err:
         raise ValueError(f"❌ Réponse JSON invalide : {err}") from err
 
@@ -94,8 +99,9 @@ def filter_versions_same_branch_higher(
         return []
 
     branch = current_tuple[:2]
-    filtered: List[str] = []
 
+    # Chaque version n'est convertie qu'une fois : le tuple sert au filtre puis au tri
+    candidates: List[Tuple[Tuple[int, ...], str]] = []
     for version in versions:
         candidate_tuple = _version_to_tuple(version)
         if not candidate_tuple:
@@ -103,10 +109,10 @@ def filter_versions_same_branch_higher(
         if candidate_tuple[:2] != branch:
             continue
         if candidate_tuple > current_tuple:
-            filtered.append(version)
+            candidates.append((candidate_tuple, version))
 
-    filtered.sort(key=lambda v: _version_to_tuple(v) or (0, 0, 0, 0))
-    return filtered
+    candidates.sort(key=lambda candidate: candidate[0])
+    return [version for _, version in candidates]
 
 
 def max_version_same_branch(current_version: str, versions: List[str]) -> Optional[str]:
@@ -119,6 +125,45 @@ def max_version_same_branch(current_version: str, versions: List[str]) -> Option
     return filtered[-1]
 
 
+BranchIndex = Dict[Tuple[int, ...], Tuple[Tuple[int, ...], str]]
+
+
+@lru_cache(maxsize=16)
+def build_branch_index(versions: Tuple[str, ...]) -> BranchIndex:
+    """
+    Indexe une liste de versions par branche (deux premiers segments).
+
+    Chaque branche est associée à sa version la plus haute sous la forme
+    (tuple de version, version d'origine). La liste n'est parsée qu'une seule fois,
+    les recherches suivantes se font par accès au dictionnaire.
+    """
+    index: BranchIndex = {}
+    for version in versions:
+        candidate_tuple = _version_to_tuple(version)
+        if not candidate_tuple:
+            continue
+        branch = candidate_tuple[:2]
+        best = index.get(branch)
+        # ">=" : à égalité, la dernière version de la liste l'emporte (comme un tri stable)
+        if best is None or candidate_tuple >= best[0]:
+            index[branch] = (candidate_tuple, version)
+    return index
+
+
+def max_version_from_index(current_version: str, index: BranchIndex) -> Optional[str]:
+    """
+    Équivalent de max_version_same_branch à partir d'un index construit par build_branch_index.
+    """
+    current_tuple = _version_to_tuple(current_version)
+    if not current_tuple:
+        return None
+
+    best = index.get(current_tuple[:2])
+    if best is None or best[0] <= current_tuple:
+        return None
+    return best[1]
+
+
 def _extract_main_version(version: str) -> str:
     """
     Extrait la partie principale d'une version gateway (avant le tiret).
@@ -131,6 +176,23 @@ def _extract_main_version(version: str) -> str:
     return parts[0] if parts else version
 
 
+def _segments_numeriques(texte: str, length: int = 4) -> List[int]:
+    """
+    Extrait les `length` premiers nombres d'une version, complétés par des zéros.
+
+    Cas courant "8.7.0.0" : découpage direct sur les points ; l'expression régulière
+    n'est utilisée que si un segment n'est pas purement numérique.
+    """
+    segments = texte.split(".")
+    if all(segment.isdecimal() for segment in segments):
+        values = [int(segment) for segment in segments[:length]]
+    else:
+        values = [int(num) for num in _VERSION_RE.findall(texte)[:length]]
+    values.extend([0] * (length - len(values)))
+    return values
+
+
+@lru_cache(maxsize=4096)
 def _gateway_version_to_tuple(version: str) -> Optional[Tuple[int, ...]]:
     """
     Convertit une version gateway complète en tuple pour comparaison.
@@ -144,18 +206,12 @@ def _gateway_version_to_tuple(version: str) -> Optional[Tuple[int, ...]]:
     main_part = parts[0] if parts else version
     secondary_part = parts[1] if len(parts) > 1 else ""
 
-    # Extraire les nombres de la partie principale
-    main_numbers = re.findall(r"\d+", main_part)
-    main_values = [int(num) for num in main_numbers[:4]]  # Limiter à 4 segments
-    while len(main_values) < 4:
-        main_values.append(0)
+    # Extraire les nombres de la partie principale (limités à 4 segments)
+    main_values = _segments_numeriques(main_part)
 
     # Extraire les nombres de la partie secondaire (avant le underscore si présent)
     secondary_clean = secondary_part.split("_")[0] if secondary_part else ""
-    secondary_numbers = re.findall(r"\d+", secondary_clean)
-    secondary_values = [int(num) for num in secondary_numbers[:4]]  # Limiter à 4 segments
-    while len(secondary_values) < 4:
-        secondary_values.append(0)
+    secondary_values = _segments_numeriques(secondary_clean)
 
     # Combiner les deux parties
     return tuple(main_values + secondary_values)
@@ -206,4 +262,47 @@ def max_version_same_branch_gateway(current_version: str, versions: List[str]) -
 
     # Trier par tuple complet et retourner la version complète maximale
     candidates.sort(key=lambda x: x[0])
-    return candidates[-1][1]
\ No newline at end of file
+    return candidates[-1][1]
+
+
+@lru_cache(maxsize=16)
+def build_gateway_branch_index(versions: Tuple[str, ...]) -> Tuple[BranchIndex, FrozenSet[str]]:
+    """
+    Indexe une liste de versions gateway par branche (deux premiers segments de la partie principale).
+
+    Retourne l'index {branche: (tuple complet, version)} de la version la plus haute de chaque
+    branche, ainsi que l'ensemble des versions disponibles.
+    """
+    index: BranchIndex = {}
+    for version in versions:
+        candidate_tuple_full = _gateway_version_to_tuple(version)
+        if not candidate_tuple_full:
+            continue
+        branch = candidate_tuple_full[:2]
+        best = index.get(branch)
+        if best is None or candidate_tuple_full >= best[0]:
+            index[branch] = (candidate_tuple_full, version)
+    return index, frozenset(versions)
+
+
+def max_version_from_gateway_index(
+    current_version: str,
+    gateway_index: Tuple[BranchIndex, FrozenSet[str]],
+) -> Optional[str]:
+    """
+    Équivalent de max_version_same_branch_gateway à partir d'un index construit par
+    build_gateway_branch_index.
+    """
+    index, available = gateway_index
+    if not current_version or not available:
+        return None
+
+    current_tuple_full = _gateway_version_to_tuple(current_version)
+    if not current_tuple_full:
+        return None
+
+    best = index.get(current_tuple_full[:2])
+    # La version actuelle absente de la liste reste candidate (et l'emporte à égalité)
+    if current_version not in available and (best is None or current_tuple_full >= best[0]):
+        return current_version
+    return best[1] if best else None
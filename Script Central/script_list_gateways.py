@@ -4,52 +4,147 @@ Module pour lister les gateways via l'API monitoring/v1/gateways.
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Dict, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 import requests
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+import http_client
+from script_load_token import build_auth_headers
+
+
+# Nombre maximal de requêtes de détails gateway envoyées en parallèle :
+# au-delà du plafond de requêtes en cours de http_client, des threads attendraient sans rien envoyer
+MAX_WORKERS_DETAILS = http_client.MAX_REQUETES_EN_COURS
+
+# Colonnes du rapport, dans l'ordre (clés de premier niveau des objets gateway)
+COLONNES_GATEWAYS = [
+    "serial",
+    "macaddr",
+    "name",
+    "ip_address",
+    "model",
+    "device_type",
+    "status",
+    "mode",
+    "group_name",
+    "site",
+    "firmware_version",
+    "firmware_backup_version",
+    "recommended",  # Présent seulement si l'API le renvoie dans la liste (voir _ligne_gateway)
+    "cpu_utilization",
+    "mem_total",
+    "mem_free",
+    "uptime",
+    "reboot_reason",
+    "role",
+    "mac_range",
+    "labels",
+]
+
+# Champs repris tels quels (tous sauf "recommended" et "labels", traités à part)
+_POSITION_RECOMMENDED = COLONNES_GATEWAYS.index("recommended")
+_CHAMPS_GATEWAY = tuple(c for c in COLONNES_GATEWAYS if c not in ("recommended", "labels"))
+_EXTRAIRE_CHAMPS_GATEWAY = itemgetter(*_CHAMPS_GATEWAY)
+
+# Compteurs entiers positifs, stockés dans le plus petit type suffisant (voir _reduire_entiers)
+COLONNES_ENTIERES_GATEWAYS = ("cpu_utilization", "mem_total", "mem_free", "uptime")
+_TYPES_ENTIERS_NON_SIGNES = ("UInt8", "UInt16", "UInt32", "UInt64")
+
+
+def _reduire_entiers(serie: pd.Series) -> pd.Series:
+    """
+    Convertit une colonne d'entiers positifs dans le plus petit type entier non signé
+    nullable qui contient toutes ses valeurs (UInt8, UInt16, UInt32 ou UInt64) ;
+    les valeurs manquantes restent vides (pd.NA).
 
-from script_load_token import get_access_token, load_token
+    La colonne est retournée inchangée si elle contient autre chose que des entiers positifs.
+    """
+    if not is_numeric_dtype(serie.dtype) or is_bool_dtype(serie.dtype):
+        return serie
 
+    valeurs = serie.dropna()
+    if valeurs.empty or (valeurs < 0).any() or not (valeurs == np.floor(valeurs)).all():
+        return serie
 
-def _recuperer_page_gateways(
-    base_url: str,
-    headers: Dict[str, str],
-    params: Dict[str, Any],
-) -> List[Dict[str, Any]]:
-    """Récupère une page de gateways et retourne la liste brute."""
-    endpoint = base_url.rstrip("/") + "/monitoring/v1/gateways"
-    response = requests.get(endpoint, headers=headers, params=params)
-    if response.status_code != 200:
-        raise ValueError(f"❌ Erreur {response.status_code}: {response.text}")
+    maximum = valeurs.max()
+    for type_entier in _TYPES_ENTIERS_NON_SIGNES:
+        if maximum <= np.iinfo(type_entier.lower()).max:
+            return serie.astype(type_entier)
+    return serie
 
-    payload = response.json() if response.text else {}
-    gateways = payload.get("gateways") or payload.get("data") or []
-    return gateways
 
+def _labels_en_texte(labels: Any) -> Any:
+    """
+    Convertit le champ "labels" (souvent une liste) en chaîne de caractères
+    pour l'affichage Excel ; une valeur vide devient "".
+    """
+    if isinstance(labels, list):
+        return ", ".join(labels)
+    return labels if labels else ""
 
-def _recuperer_details_gateway(
-    base_url: str,
-    headers: Dict[str, str],
-    serial: str,
-) -> Optional[Dict[str, Any]]:
+
+def _ligne_gateway(gateway: Dict[str, Any]) -> Tuple[Any, ...]:
     """
-    Récupère les détails d'un gateway spécifique par son numéro de série.
-    Utilise l'endpoint /monitoring/v1/gateways/{serial}
+    Extrait d'un objet gateway les valeurs de COLONNES_GATEWAYS.
+
+    La version recommandée est reprise de la liste si l'API la fournit, sous le nom
+    "recommended" ou "recommended_version" (celui de l'endpoint de détails) :
+    enrichir_gateways_recommended n'appelle alors pas l'endpoint de détails pour ce gateway.
     """
+    try:
+        # Cas courant, tous les champs présents : un seul appel C pour tous les champs
+        champs = _EXTRAIRE_CHAMPS_GATEWAY(gateway)
+    except KeyError:
+        champs = tuple(map(gateway.get, _CHAMPS_GATEWAY))
+    recommended = gateway.get("recommended") or gateway.get("recommended_version") or None
+    return (
+        *champs[:_POSITION_RECOMMENDED],
+        recommended,
+        *champs[_POSITION_RECOMMENDED:],
+        _labels_en_texte(gateway.get("labels")),
+    )
+
+
+@lru_cache(maxsize=4096)
+def _details_gateway_en_cache(base_url: str, serial: str) -> Optional[Dict[str, Any]]:
+    """
+    Appelle l'endpoint /monitoring/v1/gateways/{serial}, avec mise en cache par (base_url, serial).
+
+    Le token est relu à chaque appel (build_auth_headers est lui-même mis en cache) pour ne pas
+    faire partie de la clé de cache. Un gateway inconnu (404) est mis en cache avec None ;
+    les autres erreurs lèvent une ValueError et ne sont donc pas mises en cache.
+    Le dictionnaire retourné est partagé entre les appels et ne doit pas être modifié.
+    """
+    headers = build_auth_headers()
     endpoint = base_url.rstrip("/") + f"/monitoring/v1/gateways/{serial}"
+    response = http_client.get(endpoint, headers=headers)
+    if response.status_code == 200:
+        return http_client.lire_json(response) if response.content else {}
+    if response.status_code == 404:
+        # Gateway non trouvé, retourner None silencieusement
+        return None
+    raise ValueError(f"Erreur {response.status_code} pour gateway {serial}: {response.text[:100]}")
+
+
+def _recuperer_details_gateway(base_url: str, serial: str) -> Optional[Dict[str, Any]]:
+    """
+    Récupère les détails d'un gateway spécifique par son numéro de série.
+    Utilise l'endpoint /monitoring/v1/gateways/{serial} ; un même gateway n'est demandé
+    qu'une fois par exécution (voir _details_gateway_en_cache).
+    """
     try:
-        response = requests.get(endpoint, headers=headers)
-        if response.status_code == 200:
-            return response.json() if response.text else {}
-        elif response.status_code == 404:
-            # Gateway non trouvé, retourner None silencieusement
-            return None
-        else:
-            # Autre erreur, afficher un avertissement mais continuer
-            print(f"⚠️ Erreur {response.status_code} pour gateway {serial}: {response.text[:100]}")
-            return None
-    except Exception as err:
+        return _details_gateway_en_cache(base_url, serial)
+    except ValueError as err:
+        # Erreur HTTP ou réponse illisible : afficher un avertissement mais continuer
+        print(f"⚠️ {err}")
+        return None
+    except requests.RequestException as err:
         print(f"⚠️ Exception lors de la récupération du gateway {serial}: {err}")
         return None
 
@@ -77,78 +172,32 @@ def lister_gateways(
     if not base_url:
         raise ValueError("La base URL Aruba Central doit être fournie pour lister les gateways.")
 
-    token_payload = load_token()
-    access_token = get_access_token(token_payload)
-
-    headers = {
-        "accept": "application/json",
-        "authorization": f"Bearer {access_token}",
-    }
-
-    params_base: Dict[str, Any] = {"limit": limit}
+    filtres: Dict[str, Any] = {}
     if group:
-        params_base["group"] = group
+        filtres["group"] = group
     if label:
-        params_base["label"] = label
-
-    offset = 0
-    tous_gateways: List[Dict[str, Any]] = []
-
-    while True:
-        params = {**params_base, "offset": offset}
-        gateways = _recuperer_page_gateways(base_url=base_url, headers=headers, params=params)
-        if not gateways:
-            break
-
-        tous_gateways.extend(gateways)
-        if len(gateways) < limit:
-            break
-        offset += limit
-
-    if not tous_gateways:
+        filtres["label"] = label
+
+    # Pages conservées telles quelles puis parcourues une seule fois à la construction du DataFrame
+    pages = http_client.recuperer_pages(
+        endpoint=base_url.rstrip("/") + "/monitoring/v1/gateways",
+        headers=build_auth_headers(),
+        params=filtres,
+        cles_liste=("gateways", "data"),
+        limit=limit,
+    )
+
+    if not any(pages):
         return pd.DataFrame()
 
-    df = pd.json_normalize(tous_gateways)
-
-    # Convertir les listes en chaînes de caractères pour l'affichage Excel
-    # (notamment pour le champ "labels" qui peut être une liste)
-    if "labels" in df.columns:
-        df["labels"] = df["labels"].apply(
-            lambda x: ", ".join(x) if isinstance(x, list) and x else (x if x else "")
-        )
-
-    # Ordre des colonnes basé sur l'exemple fourni
-    columns_order = [
-        "serial",
-        "macaddr",
-        "name",
-        "ip_address",
-        "model",
-        "device_type",
-        "status",
-        "mode",
-        "group_name",
-        "site",
-        "firmware_version",
-        "firmware_backup_version",
-        "recommended",  # Ajouter recommended si présent dans la réponse API
-        "cpu_utilization",
-        "mem_total",
-        "mem_free",
-        "uptime",
-        "reboot_reason",
-        "role",
-        "mac_range",
-        "labels",
-    ]
-
-    # Ajouter les colonnes manquantes avec None
-    for col in columns_order:
-        if col not in df.columns:
-            df[col] = None
-
-    # Sélectionner uniquement les colonnes dans l'ordre souhaité
-    df = df[columns_order]
+    # Seules les colonnes du rapport sont extraites de chaque gateway (pas d'aplatissement complet),
+    # les labels étant convertis en texte au passage
+    df = pd.DataFrame.from_records(
+        [_ligne_gateway(gateway) for page in pages for gateway in page], columns=COLONNES_GATEWAYS
+    )
+
+    for colonne in COLONNES_ENTIERES_GATEWAYS:
+        df[colonne] = _reduire_entiers(df[colonne])
 
     return df
 
@@ -160,6 +209,8 @@ def enrichir_gateways_recommended(
     """
     Enrichit le DataFrame des gateways avec la colonne 'recommended' 
     en appelant l'endpoint /monitoring/v1/gateways/{serial} pour chaque gateway.
+
+    Modifie df_gateways en place (sans copie du DataFrame) et le retourne.
     """
     if df_gateways is None or df_gateways.empty:
         return df_gateways
@@ -169,37 +220,42 @@ def enrichir_gateways_recommended(
         df_gateways["recommended"] = None
         return df_gateways
 
-    token_payload = load_token()
-    access_token = get_access_token(token_payload)
-
-    headers = {
-        "accept": "application/json",
-        "authorization": f"Bearer {access_token}",
-    }
-
-    # Initialiser la colonne recommended
-    df_gateways = df_gateways.copy()
-    df_gateways["recommended"] = None
-
     # Récupérer les détails pour chaque gateway
     total = len(df_gateways)
     print(f"📡 Récupération des versions recommandées pour {total} gateway(s)...")
-    
-    count_recommended = 0
-    for idx, row in df_gateways.iterrows():
-        serial = row.get("serial")
-        if not serial or pd.isna(serial):
-            continue
-
-        details = _recuperer_details_gateway(base_url=base_url, headers=headers, serial=str(serial))
+
+    # Les gateways dont la liste fournit déjà « recommended » n'ont pas besoin d'un appel de détails
+    recommended_liste = (
+        df_gateways["recommended"]
+        if "recommended" in df_gateways.columns
+        else pd.Series(None, index=df_gateways.index, dtype=object)
+    )
+    # Numéros de série convertis une seule fois : ils servent à la fois aux appels et au mappage
+    serials_texte = df_gateways["serial"].astype(str)
+    a_recuperer = df_gateways["serial"].notna() & recommended_liste.isna()
+    serials = [serial for serial in serials_texte[a_recuperer].unique().tolist() if serial]
+
+    def recuperer_recommended(serial: str) -> Optional[str]:
+        details = _recuperer_details_gateway(base_url=base_url, serial=serial)
         if details:
             # Extraire le champ recommended_version de la réponse API
             # Le champ s'appelle "recommended_version" dans l'API Aruba Central
-            recommended = details.get("recommended_version")
-            if recommended:
-                df_gateways.at[idx, "recommended"] = recommended
-                count_recommended += 1
+            return details.get("recommended_version") or None
+        return None
+
+    # Les appels de détails sont indépendants : ils sont lancés en parallèle
+    # pour recouvrir les temps de réponse de l'API
+    recommended_par_serial: Dict[str, Optional[str]] = {}
+    if serials:
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS_DETAILS, len(serials))) as executor:
+            recommended_par_serial = dict(zip(serials, executor.map(recuperer_recommended, serials)))
 
+    # Les numéros de série vides ou absents ne sont pas dans le dictionnaire : recommended reste vide
+    recommended = recommended_liste.where(
+        recommended_liste.notna(), serials_texte.map(recommended_par_serial)
+    )
+    df_gateways["recommended"] = recommended.astype(object).where(recommended.notna(), None)
+
+    count_recommended = int(df_gateways["recommended"].notna().sum())
     print(f"✅ {count_recommended}/{total} gateway(s) avec version recommandée trouvée(s)")
     return df_gateways
-
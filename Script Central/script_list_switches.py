@@ -5,28 +5,59 @@ ceux qui appartiennent à un stack.
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from operator import itemgetter
+from typing import Any, Dict, Optional, Tuple
 
+import numpy as np
 import pandas as pd
-import requests
 
-from script_load_token import get_access_token, load_token
-
-
-def _recuperer_page_switches(
-    base_url: str,
-    headers: Dict[str, str],
-    params: Dict[str, Any],
-) -> List[Dict[str, Any]]:
-    """Récupère une page de switches et retourne la liste brute."""
-    endpoint = base_url.rstrip("/") + "/monitoring/v1/switches"
-    response = requests.get(endpoint, headers=headers, params=params)
-    if response.status_code != 200:
-        raise ValueError(f"❌ Erreur {response.status_code}: {response.text}")
+import http_client
+from script_load_token import build_auth_headers
+
+
+# Colonnes du rapport, dans l'ordre
+COLONNES_SWITCHES = [
+    "serial",
+    "macaddr",
+    "name",
+    "ip_address",
+    "model",
+    "status",
+    "group_name",
+    "site",
+    "stack_status",
+    "stack_id",
+    "stack_role",
+    "stack_member_id",
+]
+
+# Champs de premier niveau repris tels quels, puis champs stack avec leur variante dans stack_info
+_CHAMPS_SWITCH = ("serial", "macaddr", "name", "ip_address", "model", "status", "group_name", "site")
+_CHAMPS_STACK = (("stack_id", "stack_id"), ("stack_role", "role"), ("stack_member_id", "member_id"))
+_COLONNES_EXTRAITES = [*_CHAMPS_SWITCH, *(colonne for colonne, _ in _CHAMPS_STACK)]
+_EXTRAIRE_CHAMPS_SWITCH = itemgetter(*_CHAMPS_SWITCH)
+
+
+def _ligne_switch(switch: Dict[str, Any]) -> Tuple[Any, ...]:
+    """
+    Extrait d'un objet switch les valeurs de _COLONNES_EXTRAITES.
 
-    payload = response.json() if response.text else {}
-    switches = payload.get("switches") or payload.get("data") or []
-    return switches
+    Colonnes stack : on essaie de récupérer les différentes variantes possibles
+    (champ de premier niveau, sinon champ équivalent de stack_info).
+    """
+    try:
+        # Cas courant, tous les champs présents : un seul appel C pour tous les champs
+        champs = _EXTRAIRE_CHAMPS_SWITCH(switch)
+    except KeyError:
+        champs = tuple(map(switch.get, _CHAMPS_SWITCH))
+    stack_info = switch.get("stack_info") or {}
+    return (
+        *champs,
+        *(
+            switch[colonne] if colonne in switch else stack_info.get(cle)
+            for colonne, cle in _CHAMPS_STACK
+        ),
+    )
 
 
 def lister_switches_stack(
@@ -55,72 +86,34 @@ def lister_switches_stack(
     if not base_url:
         raise ValueError("La base URL Aruba Central doit être fournie pour lister les switches.")
 
-    token_payload = load_token()
-    access_token = get_access_token(token_payload)
-
-    headers = {
-        "accept": "application/json",
-        "authorization": f"Bearer {access_token}",
-    }
-
-    params_base: Dict[str, Any] = {"limit": limit}
+    filtres: Dict[str, Any] = {}
     if group:
-        params_base["group"] = group
+        filtres["group"] = group
     if label:
-        params_base["label"] = label
+        filtres["label"] = label
     if stack_id:
-        params_base["stack_id"] = stack_id
-
-    offset = 0
-    tous_switches: List[Dict[str, Any]] = []
-
-    while True:
-        params = {**params_base, "offset": offset}
-        switches = _recuperer_page_switches(base_url=base_url, headers=headers, params=params)
-        if not switches:
-            break
-
-        tous_switches.extend(switches)
-        if len(switches) < limit:
-            break
-        offset += limit
+        filtres["stack_id"] = stack_id
+
+    # Pages conservées telles quelles puis parcourues une seule fois à la construction du DataFrame
+    pages = http_client.recuperer_pages(
+        endpoint=base_url.rstrip("/") + "/monitoring/v1/switches",
+        headers=build_auth_headers(),
+        params=filtres,
+        cles_liste=("switches", "data"),
+        limit=limit,
+    )
 
-    if not tous_switches:
+    if not any(pages):
         return pd.DataFrame()
 
-    df = pd.json_normalize(tous_switches)
-
-    # Colonnes stack -> on essaie de récupérer les différentes variantes possibles
-    if "stack_id" not in df.columns:
-        df["stack_id"] = df.get("stack_info.stack_id")
-    if "stack_role" not in df.columns:
-        df["stack_role"] = df.get("stack_info.role")
-    if "stack_member_id" not in df.columns:
-        df["stack_member_id"] = df.get("stack_info.member_id")
-
-    df["stack_status"] = df["stack_id"].apply(
-        lambda sid: "Stack" if pd.notna(sid) and str(sid).strip() not in ("", "0") else "Standalone"
+    # Seules les colonnes du rapport sont extraites de chaque switch (pas d'aplatissement complet)
+    df = pd.DataFrame.from_records(
+        [_ligne_switch(switch) for page in pages for switch in page], columns=_COLONNES_EXTRAITES
     )
 
-    columns_order = [
-        "serial",
-        "macaddr",
-        "name",
-        "ip_address",
-        "model",
-        "status",
-        "group_name",
-        "site",
-        "stack_status",
-        "stack_id",
-        "stack_role",
-        "stack_member_id",
-    ]
-
-    for col in columns_order:
-        if col not in df.columns:
-            df[col] = None
-
-    df = df[columns_order]
-    return df
+    # Un switch est en stack si son stack_id est renseigné (ni vide ni "0")
+    stack_id_texte = df["stack_id"].astype("string").str.strip()
+    en_stack = (stack_id_texte.notna() & ~stack_id_texte.isin(["", "0"])).to_numpy(dtype=bool)
+    df["stack_status"] = np.where(en_stack, "Stack", "Standalone")
 
+    return df[COLONNES_SWITCHES]
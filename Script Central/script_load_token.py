@@ -7,8 +7,109 @@ et l'extraction du token d'accès nécessaire pour les appels API.
 
 import os
 import json
-import glob
-from typing import Any, Dict, Optional
+import time
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    orjson = None
+
+
+# Durée de vie supposée d'un token sans champ "expires_in", en secondes
+DUREE_TOKEN_PAR_DEFAUT = 900.0
+
+# Le token en cache est abandonné un peu avant son expiration
+MARGE_EXPIRATION_TOKEN = 60.0
+
+# Noms des fichiers de token générés par le SDK Aruba Central :
+# tok_*.json (format standard, ex: tok_03a7a1a7eb7848559f45c3bd2714cb53_...) ou token_*.json
+PREFIXES_TOKEN = ("tok_", "token_")
+EXTENSION_TOKEN = ".json"
+
+# Dernier token chargé par (dossier, récursif) : (contenu, échéance sur time.monotonic())
+_TOKEN_EN_CACHE: Dict[Tuple[str, bool], Tuple[Dict[str, Any], float]] = {}
+
+
+@lru_cache(maxsize=8)
+def _lire_fichier_token(chemin: str, mtime: float) -> Dict[str, Any]:
+    """
+    Parse un fichier de token ; la date de modification fait partie de la clé de cache.
+    Utilise orjson s'il est installé, sinon json de la bibliothèque standard.
+    """
+    if orjson is not None:
+        with open(chemin, "rb") as f:
+            return orjson.loads(f.read())
+    with open(chemin, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _trouver_token_le_plus_recent(folder: str, recursive: bool) -> Tuple[Optional[str], float]:
+    """
+    Parcourt le dossier (et ses sous-dossiers si `recursive`) avec os.scandir et retourne
+    le chemin du fichier de token le plus récent et sa date de modification,
+    ou (None, 0.0) si aucun fichier ne correspond.
+
+    Comme glob, les dossiers cachés (commençant par un point) ne sont pas parcourus
+    et les liens symboliques vers des dossiers sont suivis ; un dossier déjà parcouru
+    (boucle de liens symboliques) n'est pas relu.
+    """
+    meilleur_chemin: Optional[str] = None
+    meilleur_mtime = 0.0
+    dossiers = [folder]
+    dossiers_vus = set()
+    while dossiers:
+        dossier = dossiers.pop()
+        try:
+            infos = os.stat(dossier)
+            identifiant = (infos.st_dev, infos.st_ino)
+            if identifiant in dossiers_vus:
+                continue
+            dossiers_vus.add(identifiant)
+            entrees = os.scandir(dossier)
+        except OSError:
+            continue
+        with entrees:
+            for entree in entrees:
+                nom = entree.name
+                try:
+                    if entree.is_dir():
+                        if recursive and not nom.startswith("."):
+                            dossiers.append(entree.path)
+                    elif nom.startswith(PREFIXES_TOKEN) and nom.endswith(EXTENSION_TOKEN) and entree.is_file():
+                        mtime = entree.stat().st_mtime
+                        if meilleur_chemin is None or mtime > meilleur_mtime:
+                            meilleur_chemin, meilleur_mtime = entree.path, mtime
+                except OSError:
+                    # Fichier supprimé ou inaccessible pendant le parcours
+                    continue
+    return meilleur_chemin, meilleur_mtime
+
+
+def invalidate_token_cache() -> None:
+    """
+    Vide le cache des tokens déjà chargés.
+
+    Le token chargé est réutilisé sans relire le dossier jusqu'à son expiration ;
+    cette fonction force une nouvelle recherche, par exemple après une réponse 401
+    ou le renouvellement du token avant son échéance.
+    """
+    _TOKEN_EN_CACHE.clear()
+    _lire_fichier_token.cache_clear()
+
+
+def _duree_validite_token(token_data: Dict[str, Any], mtime: float) -> float:
+    """
+    Durée restante (en secondes) pendant laquelle le token peut être réutilisé sans relire
+    le dossier : "expires_in" compté depuis l'écriture du fichier, moins une marge.
+    """
+    try:
+        expires_in = float(token_data.get("expires_in", DUREE_TOKEN_PAR_DEFAUT))
+    except (TypeError, ValueError):
+        expires_in = DUREE_TOKEN_PAR_DEFAUT
+    return expires_in - (time.time() - mtime) - MARGE_EXPIRATION_TOKEN
 
 
 def load_token(folder: Optional[str] = None, recursive: bool = True) -> Dict[str, Any]:
@@ -32,7 +133,10 @@ def load_token(folder: Optional[str] = None, recursive: bool = True) -> Dict[str
     Returns
     -------
     Dict[str, Any]
-        Contenu JSON parsé du fichier de token (dictionnaire Python)
+        Contenu JSON parsé du fichier de token (dictionnaire Python).
+        Le token est réutilisé sans relire le dossier jusqu'à son expiration
+        (voir invalidate_token_cache) : le dictionnaire retourné est partagé
+        entre les appels et ne doit pas être modifié.
     
     Raises
     ------
@@ -50,32 +154,22 @@ def load_token(folder: Optional[str] = None, recursive: bool = True) -> Dict[str
     # Vérification de la variable d'environnement CENTRAL_TOKEN_DIR (priorité la plus haute)
     # Cette variable est définie automatiquement par main.py pour isoler les tokens par client
     folder = os.environ.get("CENTRAL_TOKEN_DIR", default_dir)
+
+    # Token encore valide déjà chargé pour ce dossier : pas de nouvelle recherche de fichiers
+    cle_cache = (folder, recursive)
+    en_cache = _TOKEN_EN_CACHE.get(cle_cache)
+    if en_cache is not None and time.monotonic() < en_cache[1]:
+        return en_cache[0]
     
     # Vérification que le dossier existe
     if not os.path.isdir(folder):
         raise FileNotFoundError(f"❌ Le dossier {folder} n'existe pas.")
 
-    # Motifs de recherche pour les fichiers de token
-    # Ces motifs correspondent aux noms de fichiers générés par le SDK Aruba Central
-    patterns = [
-        "tok_*.json",      # Format standard du SDK (ex: tok_03a7a1a7eb7848559f45c3bd2714cb53_...)
-        "token_*.json",    # Format alternatif
-    ]
-
-    # Recherche de tous les fichiers correspondant aux motifs
-    candidate_paths = []
-    for pattern in patterns:
-        # Construction du chemin de recherche avec ou sans récursivité
-        search_glob = os.path.join(folder, "**", pattern) if recursive else os.path.join(folder, pattern)
-        # Extension de la liste avec les fichiers trouvés
-        candidate_paths.extend(glob.glob(search_glob, recursive=recursive))
-
-    # Déduplication des chemins tout en préservant l'ordre
-    # Utilisation d'un dictionnaire pour supprimer les doublons
-    files = list(dict.fromkeys(candidate_paths))
+    # Recherche du fichier de token le plus récent, en un seul parcours du dossier
+    latest_path, latest_mtime = _trouver_token_le_plus_recent(folder, recursive)
 
     # Gestion du cas où aucun fichier n'est trouvé
-    if not files:
+    if latest_path is None:
         # Tentative de lister le contenu du dossier pour aider au débogage
         try:
             immediate = sorted(os.listdir(folder))
@@ -89,19 +183,17 @@ def load_token(folder: Optional[str] = None, recursive: bool = True) -> Dict[str
             "❌ Aucun fichier de token trouvé.\n"
             f"Dossier inspecté: {folder}\n"
             f"Récursif: {recursive}\n"
-            f"Motifs recherchés: {', '.join(patterns)}\n"
+            f"Motifs recherchés: {', '.join(f'{prefixe}*{EXTENSION_TOKEN}' for prefixe in PREFIXES_TOKEN)}\n"
             f"Contenu du dossier (niveau immédiat): {hint_listing or '(vide)'}\n"
             "Vérifiez que le token a bien été téléchargé et placé dans ce dossier."
         )
 
-    # Tri des fichiers par date de modification (le plus récent en premier)
-    files.sort(key=lambda p: os.path.getmtime(p), reverse=True)
-    # Sélection du fichier le plus récent
-    latest_path = files[0]
+    # Lecture et parsing du fichier JSON, mis en cache tant que le fichier n'est pas modifié
+    token_data: Dict[str, Any] = _lire_fichier_token(latest_path, latest_mtime)
 
-    # Lecture et parsing du fichier JSON
-    with open(latest_path, "r", encoding="utf-8") as f:
-        token_data: Dict[str, Any] = json.load(f)
+    duree_validite = _duree_validite_token(token_data, latest_mtime)
+    if duree_validite > 0:
+        _TOKEN_EN_CACHE[cle_cache] = (token_data, time.monotonic() + duree_validite)
 
     return token_data
 
@@ -143,3 +235,28 @@ def get_access_token(token_payload: Dict[str, Any]) -> str:
     
     # Conversion en string pour garantir le type de retour
     return str(access_token)
+
+
+@lru_cache(maxsize=8)
+def _entetes_pour_token(access_token: str) -> Mapping[str, str]:
+    """En-têtes d'authentification d'un token, construits une seule fois par token."""
+    return MappingProxyType({
+        "accept": "application/json",
+        "authorization": f"Bearer {access_token}",
+    })
+
+
+def build_auth_headers() -> Mapping[str, str]:
+    """
+    Retourne les en-têtes HTTP des appels API avec le token d'accès courant.
+
+    Le token est chargé via load_token (mis en cache jusqu'à son expiration).
+    Les en-têtes sont en lecture seule (MappingProxyType) : le même objet est partagé
+    par tous les appels et threads utilisant ce token, sans risque de modification.
+
+    Returns
+    -------
+    Mapping[str, str]
+        En-têtes "accept" et "authorization" (Bearer).
+    """
+    return _entetes_pour_token(get_access_token(load_token()))
@@ -648,7 +648,7 @@ def exporter_rapports_vers_excel(
         Chemin du fichier Excel de sortie
     """
     import os
-    from excel_format import formater_excel
+    from excel_export import OPTIONS_XLSXWRITER, ecrire_feuille
     
     os.makedirs(os.path.dirname(fichier_sortie) if os.path.dirname(fichier_sortie) else ".", exist_ok=True)
     
@@ -661,27 +661,27 @@ def exporter_rapports_vers_excel(
         print("ℹ️  Le fichier Excel ne sera pas créé car il n'y a aucune donnée.")
         return
     
-    with pd.ExcelWriter(fichier_sortie, engine="openpyxl") as writer:
+    with pd.ExcelWriter(
+        fichier_sortie,
+        engine="xlsxwriter",
+        engine_kwargs={"options": OPTIONS_XLSXWRITER},
+    ) as writer:
         if has_generated:
-            df_rapports_generes.to_excel(writer, sheet_name="Rapports Générés", index=False)
-            formater_excel(writer, "Rapports Générés")
+            ecrire_feuille(writer, "Rapports Générés", df_rapports_generes)
             print(f"✅ Feuille 'Rapports Générés' ajoutée avec {len(df_rapports_generes)} rapport(s).")
         else:
             # Créer une feuille vide avec un message si pas de données
             df_vide = pd.DataFrame({"Message": ["Aucun rapport généré trouvé pour la période spécifiée."]})
-            df_vide.to_excel(writer, sheet_name="Rapports Générés", index=False)
-            formater_excel(writer, "Rapports Générés")
+            ecrire_feuille(writer, "Rapports Générés", df_vide)
             print("ℹ️  Feuille 'Rapports Générés' créée (vide).")
         
         if has_scheduled:
-            df_rapports_programmes.to_excel(writer, sheet_name="Rapports Programmés", index=False)
-            formater_excel(writer, "Rapports Programmés")
+            ecrire_feuille(writer, "Rapports Programmés", df_rapports_programmes)
             print(f"✅ Feuille 'Rapports Programmés' ajoutée avec {len(df_rapports_programmes)} rapport(s).")
         elif df_rapports_programmes is not None:
             # Créer une feuille vide avec un message si pas de données
             df_vide = pd.DataFrame({"Message": ["Aucun rapport programmé trouvé."]})
-            df_vide.to_excel(writer, sheet_name="Rapports Programmés", index=False)
-            formater_excel(writer, "Rapports Programmés")
+            ecrire_feuille(writer, "Rapports Programmés", df_vide)
             print("ℹ️  Feuille 'Rapports Programmés' créée (vide).")
     
     print(f"✅ Fichier Excel généré : {os.path.abspath(fichier_sortie)}")
@@ -0,0 +1,70 @@
+"""
+Tests de l'export Excel xlsxwriter (excel_export.export_to_excel).
+
+Lancement depuis le dossier « Script Central » : python -m unittest discover -s tests
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from excel_export import export_to_excel  # noqa: E402
+
+try:
+    from script_mrt_reports import exporter_rapports_vers_excel  # noqa: E402
+except ImportError:  # oauthlib / requests-oauthlib non installés
+    exporter_rapports_vers_excel = None
+
+
+class TestExportExcel(unittest.TestCase):
+    def setUp(self):
+        self.dossier = tempfile.TemporaryDirectory()
+        self.fichier = Path(self.dossier.name) / "rapport.xlsx"
+
+    def tearDown(self):
+        self.dossier.cleanup()
+
+    def test_listes_infinis_et_dates(self):
+        inventaire = pd.DataFrame(
+            {
+                "serial": ["SN1", "SN2", "SN3"],
+                "services": [["foundation", "advanced"], {"ap": 1}, None],
+                "uptime": [1.5, np.inf, -np.inf],
+                "last_seen": pd.to_datetime(["2024-01-02 03:04:05", None, "2024-05-06 07:08:09"]),
+            }
+        )
+
+        # Les deux écritures (xlsxwriter et --fast-excel) doivent produire les mêmes cellules
+        for rapide in (False, True):
+            with self.subTest(rapide=rapide):
+                export_to_excel(str(self.fichier), {"inventaire": inventaire}, rapide=rapide)
+
+                ws = load_workbook(self.fichier)["Inventaire"]
+                lignes = list(ws.iter_rows(values_only=True))
+                self.assertEqual(lignes[0], ("serial", "services", "uptime", "last_seen"))
+                self.assertEqual([ligne[1] for ligne in lignes[1:]], ["['foundation', 'advanced']", "{'ap': 1}", None])
+                self.assertEqual([ligne[2] for ligne in lignes[1:]], [1.5, "inf", "-inf"])
+                self.assertEqual(lignes[1][3], pd.Timestamp("2024-01-02 03:04:05").to_pydatetime())
+                self.assertIsNone(lignes[2][3])
+                self.assertEqual(ws["D2"].number_format, "yyyy-mm-dd hh:mm:ss")
+
+    @unittest.skipIf(exporter_rapports_vers_excel is None, "dépendances MRT non installées")
+    def test_rapports_mrt(self):
+        rapports = pd.DataFrame({"name": ["Rapport AP"], "id": [42]})
+
+        exporter_rapports_vers_excel(rapports, pd.DataFrame(), str(self.fichier))
+
+        classeur = load_workbook(self.fichier)
+        self.assertEqual(classeur.sheetnames, ["Rapports Générés", "Rapports Programmés"])
+        self.assertEqual(list(classeur["Rapports Générés"].iter_rows(values_only=True)), [("name", "id"), ("Rapport AP", 42)])
+
+
+if __name__ == "__main__":
+    unittest.main()